@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_keyset_pagination_indexes'),
+        ('companies', '0014_membership'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='customuser',
+            name='administered_companies',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='companies',
+        ),
+    ]
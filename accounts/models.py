@@ -7,16 +7,8 @@ from core.models import TimeStampedModel
 class CustomUser(AbstractUser, TimeStampedModel):
    avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
    additional_info = models.TextField(blank=True, null=True)
-   companies = models.ManyToManyField(
-      'companies.Company', 
-      related_name='companies_member', 
-      related_query_name='company_member', 
-      blank=True
-      )
-   administered_companies = models.ManyToManyField(
-      'companies.Company', 
-      related_name='company_administrators', 
-      related_query_name='company_administrator', 
-      blank=True
-      )
 
+   class Meta(AbstractUser.Meta):
+      indexes = [
+         models.Index(fields=['created_at', 'id'], name='user_created_id_idx'),
+      ]
@@ -1,14 +1,6 @@
-from rest_framework import response, status
-
-from log_app.serializers import LoggerSerializer
+from log_app.buffer import buffer_log_record
 
 
 def log_to_logger(level, message):
-    log_data = {'level': level, 'message': message}
-    log_serializer = LoggerSerializer(data=log_data)
-    if log_serializer.is_valid():
-        log_serializer.save()
-    else:
-        return response.Response({'error': 'Failed to create user.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-    
\ No newline at end of file
+    # Queued in Redis and written in batches by log_app.tasks.flush_log_buffer
+    buffer_log_record(level, message)
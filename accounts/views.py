@@ -1,14 +1,12 @@
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
-from django.db.models import Case, Count, FloatField, Sum, Value, When
-from django.db.models.functions import TruncDate
+from django.db.models import Q
 from django.urls import reverse
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 
@@ -17,21 +15,34 @@ from accounts.permissions import NoAuthenticationNeeded
 from accounts.serializers import AvatarUploadSerializer, UserSerializer
 from accounts.utils import log_to_logger
 from companies.models import Company
+from core.pagination import KeysetPagination
 from invitations.models import CompanyInvitation, InvitationStatus
 from invitations.serializers import AcceptInvitationSerializer, LeaveCompanySerializer, SendRequestSerializer
 from notifications.models import Notification
 from notifications.serializers import NotificationSerializer
-from quizzes.models import Answer, QuizResult, UserAnswer
+from notifications.utils import get_unread_count, mark_notifications_read
+from quizzes.analytics import average_score as results_average_score
+from quizzes.analytics import parse_time_series_params, score_time_series, score_time_series_by_user
+from quizzes.models import DailyScoreRollup, QuizResult
 from quizzes.serializers import QuizResultSerializer
 
 
-class UserPagination(PageNumberPagination):
-    page_size = 5
+class ScoreCurvePagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 500
+
+
+def is_own_account(request, user):
+    return request.user.is_authenticated and request.user.pk == user.pk
+
+
+class NotificationCursorPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = CustomUser.objects.all().order_by('created_at')
     serializer_class = UserSerializer
-    pagination_class = UserPagination
+    pagination_class = KeysetPagination
 
     permission_classes_by_action = {
         'create': [NoAuthenticationNeeded],  
@@ -42,7 +53,7 @@ class UserViewSet(viewsets.ModelViewSet):
             queryset = self.filter_queryset(self.get_queryset())
             page = self.paginate_queryset(queryset)
 
-            if page:
+            if page is not None:
                 serializer = self.get_serializer(page, many=True)
                 return self.get_paginated_response(serializer.data)
             
@@ -227,6 +238,8 @@ class UserViewSet(viewsets.ModelViewSet):
             company_id = serializer.validated_data['company_id']
             company = Company.objects.prefetch_related('members').get(pk=company_id)
             if company.members.filter(id=user.id).exists():
+                if company.owner_id == user.id:
+                    return Response({'error': 'The owner cannot leave the company'}, status=status.HTTP_400_BAD_REQUEST)
                 company.members.remove(user.id)
                 return Response({'message': 'Member left successfully'}, status=status.HTTP_200_OK)
             else:
@@ -269,20 +282,8 @@ class UserViewSet(viewsets.ModelViewSet):
     def get_user_average_score_all_companies(self, request, pk=None):
         user = self.get_object()  
 
-        user_quiz_results = CustomUser.objects.prefetch_related(
-            'quizresult_set__quiz',  
-        ).get(id=user.id).quizresult_set.all()
-
-        
-        total_correct_answers = 0
-
-        for quiz_result in user_quiz_results:
-            total_correct_answers += quiz_result.score 
-
-        total_answers = UserAnswer.objects.filter(
-            quiz_attempt__user=user,
-        ).count()
-        average_score = total_correct_answers / total_answers if total_answers > 0 else 0
+        user_quiz_results = QuizResult.objects.filter(user=user)
+        average_score = results_average_score(user_quiz_results)
 
         quiz_results_serializer = QuizResultSerializer(user_quiz_results, many=True)
 
@@ -297,118 +298,94 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'], url_path='average-scores-over-time')
     def get_average_scores_over_time(self, request, pk=None):
         user = self.get_object()
-        cumulative_results = []
-
-        quiz_results = (
-            QuizResult.objects
-            .filter(user=user, quiz_attempt__user=user,)
-            .annotate(
-                date=TruncDate('timestamp')
-            )
-            .values('date')
-            .annotate(
-               total_correct_answers=Sum(
-                    Case(
-                        When(
-                            quiz_attempt__useranswer__chosen_answer__in=Answer.objects.filter(is_correct=True),
-                            then=Value(1.0),
-                        ),
-                        default=Value(0.0),
-                        output_field=FloatField()
-                    )
-                    ),
-                total_answers=Count(
-                    'quiz_attempt__useranswer'
-                ),
-            )
-            .order_by('date')
-        )
-
-        cumulative_total_correct = 0.0
-        cumulative_total_answers = 0.0
-        quiz_results_data = []
-
-        for result in quiz_results:
-            cumulative_total_correct += result['total_correct_answers']
-            cumulative_total_answers += result['total_answers']
-            average_score = cumulative_total_correct / cumulative_total_answers if cumulative_total_answers > 0.0 else 0
-
-            quiz_results_data.append({
-                'date': result['date'],
-                'average_score': average_score,
-            })
+        try:
+            date_from, date_to, bucket = parse_time_series_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        cumulative_results.append({
-            'user': user.username,  
-            'results_data': quiz_results_data,
-        })
+        rollups = DailyScoreRollup.objects.filter(user=user)
+        cumulative_results = [{
+            'user': user.username,
+            'results_data': score_time_series(rollups, date_from, date_to, bucket),
+        }]
 
         return Response(cumulative_results)
 
     @action(detail=False, methods=['get'], url_path='all-average-scores-over-time')
     def get_all_average_scores_over_time(self, request):
-        cumulative_results = []
-
-        users = CustomUser.objects.all()
-
-        for user in users:
-            quiz_results = (
-                QuizResult.objects
-                .filter(user=user)
-                .annotate(
-                    date=TruncDate('timestamp')
-                )
-                .values('date')
-                .annotate(
-                    total_correct_answers=Sum(
-                    Case(
-                        When(
-                            quiz_attempt__user=user,
-                            quiz_attempt__useranswer__chosen_answer__in=Answer.objects.filter(is_correct=True),
-                            then=Value(1.0),
-                        ),
-                        default=Value(0.0),
-                        output_field=FloatField()
-                    )
-                    ),
-                    total_answers=Count(
-                    'quiz_attempt__useranswer'
-                ),
-                )
-                .order_by('date')
-            )
+        try:
+            date_from, date_to, bucket = parse_time_series_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        users = CustomUser.objects.only('id', 'username', 'created_at')
+        rollups = DailyScoreRollup.objects.all()
+
+        company_id = request.query_params.get('company')
+        if company_id is not None:
+            if not company_id.isdigit():
+                return Response({'error': 'company must be an integer id'}, status=status.HTTP_400_BAD_REQUEST)
+            users = users.filter(member_company=company_id)
+            rollups = rollups.filter(company_id=company_id)
+
+        paginator = ScoreCurvePagination()
+        page = paginator.paginate_queryset(users, request, view=self)
+        curves = score_time_series_by_user(
+            rollups.filter(user__in=[user.id for user in page]),
+            date_from,
+            date_to,
+            bucket,
+        )
 
-            cumulative_total_correct = 0.0
-            cumulative_total_answers = 0.0
-            quiz_results_data = []
-            for result in quiz_results:
-                cumulative_total_correct += result['total_correct_answers']
-                cumulative_total_answers += result['total_answers']
-                if cumulative_total_answers > 0.0:
-                    average_score = cumulative_total_correct / cumulative_total_answers  
-                else: 
-                    average_score = 0.0
-
-                quiz_results_data.append({
-                    'date': result['date'],
-                    'average_score': average_score,
-                })
-
-            cumulative_results.append({
-                'user': user.username,  # Include user's username or any identifying field
-                'results_data': quiz_results_data,
-            })
+        cumulative_results = [
+            {
+                'user': user.username,
+                'results_data': curves.get(user.id, []),
+            }
+            for user in page
+        ]
 
-        return Response(cumulative_results)
+        return paginator.get_paginated_response(cumulative_results)
 
     @action(detail=True, methods=['get'])
     def get_notifications(self, request, pk=None):
         user = self.get_object()
-        notifications = Notification.objects.prefetch_related('user').filter(user=user)
-        serializer = NotificationSerializer(notifications, many=True)
-        for notification in notifications:
-            notification.mark_as_read()
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if not is_own_account(request, user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        paginator = NotificationCursorPagination()
+        page = paginator.paginate_queryset(Notification.objects.filter(user=user), request, view=self)
+        serializer = NotificationSerializer(page, many=True)
+        # The page is serialized as it was stored, then marked read with a single UPDATE
+        mark_notifications_read(user.id, Notification.objects.filter(id__in=[notification.id for notification in page]))
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['post'], url_path='notifications/mark-read')
+    def mark_read_notifications(self, request, pk=None):
+        user = self.get_object()
+        if not is_own_account(request, user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        notifications = Notification.objects.all()
+
+        up_to = request.data.get('up_to')
+        if up_to is not None:
+            if not str(up_to).isdigit():
+                return Response({'error': 'up_to must be a notification id'}, status=status.HTTP_400_BAD_REQUEST)
+            last = Notification.objects.filter(user=user, id=up_to).values('id', 'created_at').first()
+            if last is None:
+                return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+            notifications = notifications.filter(
+                Q(created_at__lt=last['created_at']) | Q(created_at=last['created_at'], id__lte=last['id'])
+            )
+
+        updated = mark_notifications_read(user.id, notifications)
+        return Response({'marked_read': updated}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], url_path='notifications/unread-count')
+    def get_unread_notifications_count(self, request, pk=None):
+        user = self.get_object()
+        if not is_own_account(request, user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        return Response({'user_id': user.id, 'unread_count': get_unread_count(user.id)}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], url_path='by-username/(?P<username>[^/.]+)')
     def get_user_by_username(self, request, username=None):
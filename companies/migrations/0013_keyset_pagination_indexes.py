@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-17 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0012_alter_company_administrators'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['is_visible', 'created_at', 'id'], name='company_visible_created_idx'),
+        ),
+    ]
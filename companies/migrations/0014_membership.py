@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+ROLE_RANK = {'member': 0, 'administrator': 1, 'owner': 2}
+
+
+def copy_memberships(apps, schema_editor):
+    Company = apps.get_model('companies', 'Company')
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Membership = apps.get_model('companies', 'Membership')
+
+    # Every pair keeps its strongest role across the four old relations and the owner column
+    roles = {}
+
+    def merge(pairs, role):
+        for company_id, user_id in pairs.iterator(chunk_size=2000):
+            current = roles.get((company_id, user_id))
+            if current is None or ROLE_RANK[role] > ROLE_RANK[current]:
+                roles[(company_id, user_id)] = role
+
+    merge(Company.members.through.objects.values_list('company_id', 'customuser_id'), 'member')
+    merge(CustomUser.companies.through.objects.values_list('company_id', 'customuser_id'), 'member')
+    merge(Company.administrators.through.objects.values_list('company_id', 'customuser_id'), 'administrator')
+    merge(CustomUser.administered_companies.through.objects.values_list('company_id', 'customuser_id'), 'administrator')
+    merge(Company.objects.values_list('id', 'owner_id'), 'owner')
+
+    Membership.objects.bulk_create(
+        [Membership(company_id=company_id, user_id=user_id, role=role) for (company_id, user_id), role in roles.items()],
+        batch_size=1000,
+    )
+
+
+def restore_memberships(apps, schema_editor):
+    Company = apps.get_model('companies', 'Company')
+    Membership = apps.get_model('companies', 'Membership')
+
+    members = []
+    administrators = []
+    for company_id, user_id, role in Membership.objects.values_list('company_id', 'user_id', 'role').iterator():
+        members.append(Company.members.through(company_id=company_id, customuser_id=user_id))
+        if role != 'member':
+            administrators.append(Company.administrators.through(company_id=company_id, customuser_id=user_id))
+
+    Company.members.through.objects.bulk_create(members, batch_size=1000, ignore_conflicts=True)
+    Company.administrators.through.objects.bulk_create(administrators, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0009_keyset_pagination_indexes'),
+        ('companies', '0013_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Membership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('owner', 'Owner'), ('administrator', 'Administrator'), ('member', 'Member')], default='member', max_length=20)),
+                ('joined_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='companies.company')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'role'], name='membership_company_role_idx'), models.Index(fields=['user', 'role'], name='membership_user_role_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='membership',
+            constraint=models.UniqueConstraint(fields=('company', 'user'), name='unique_company_membership'),
+        ),
+        migrations.RunPython(copy_memberships, restore_memberships),
+    ]
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('companies', '0014_membership'),
+        ('accounts', '0010_remove_customuser_companies'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='company',
+            name='administrators',
+        ),
+        migrations.RemoveField(
+            model_name='company',
+            name='members',
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='members',
+            field=models.ManyToManyField(blank=True, related_name='members_company', related_query_name='member_company', through='companies.Membership', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
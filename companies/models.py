@@ -1,8 +1,46 @@
 from django.db import models
+from django.db.models import DEFERRED
+from django.db.models.signals import m2m_changed, post_init, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
 
 from accounts.models import CustomUser
 from core.models import TimeStampedModel
 
+from .roles import ADMINISTRATOR, MEMBER, OWNER, invalidate_user_roles, is_owner_or_administrator
+
+
+class CompanyAdministrators:
+    # Keeps the old company.administrators many-to-many API on top of Membership roles
+    def __init__(self, company):
+        self.company = company
+
+    def all(self):
+        return CustomUser.objects.filter(
+            membership__company=self.company, membership__role__in=(OWNER, ADMINISTRATOR)
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.all(), name)
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def add(self, *users):
+        user_ids = [getattr(user, 'pk', user) for user in users]
+        memberships = Membership.objects.filter(company=self.company, user_id__in=user_ids)
+        memberships.filter(role=MEMBER).update(role=ADMINISTRATOR)
+        Membership.objects.bulk_create(
+            [Membership(company=self.company, user_id=user_id, role=ADMINISTRATOR) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        invalidate_user_roles(user_ids)
+
+    def remove(self, *users):
+        user_ids = [getattr(user, 'pk', user) for user in users]
+        Membership.objects.filter(company=self.company, user_id__in=user_ids, role=ADMINISTRATOR).update(role=MEMBER)
+        invalidate_user_roles(user_ids)
+
 
 class Company(TimeStampedModel):
     owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
@@ -10,31 +48,95 @@ class Company(TimeStampedModel):
     description = models.TextField(blank=True, null=True)
     is_visible = models.BooleanField(default=True)
     members = models.ManyToManyField(
-        'accounts.CustomUser', 
-        related_name='members_company', 
-        related_query_name='member_company', 
+        'accounts.CustomUser',
+        through='Membership',
+        related_name='members_company',
+        related_query_name='member_company',
         blank=True
         )
-    administrators = models.ManyToManyField(
-        'accounts.CustomUser', 
-        related_name='administrator_companies', 
-        related_query_name='administrator_company',
-        blank=True,
-        )
 
     def __str__(self):
         return self.name
-    
+
     def save(self, *args, **kwargs):
+        if self._state.adding:
+            previous_owner_id = None
+        elif 'owner_id' not in self.__dict__:
+            # Still deferred, so the owner was neither read nor assigned
+            previous_owner_id = DEFERRED
+        elif self._loaded_owner_id is DEFERRED:
+            previous_owner_id = Company.objects.filter(pk=self.pk).values_list('owner_id', flat=True).first()
+        else:
+            previous_owner_id = self._loaded_owner_id
         super().save(*args, **kwargs)
-        self.administrators.add(self.owner)  # Add the owner as an administrator when the company is saved
+        # Only a new company or a new owner touches the membership table
+        if previous_owner_id is not DEFERRED and previous_owner_id != self.owner_id:
+            self._set_owner_membership(previous_owner_id)
+        self._loaded_owner_id = self.__dict__.get('owner_id', DEFERRED)
+
+    def _set_owner_membership(self, previous_owner_id):
+        if previous_owner_id is not None:
+            Membership.objects.filter(company=self, user_id=previous_owner_id).update(role=ADMINISTRATOR)
+        Membership.objects.update_or_create(company=self, user_id=self.owner_id, defaults={'role': OWNER})
+        invalidate_user_roles({previous_owner_id, self.owner_id} - {None})
+
+    @property
+    def administrators(self):
+        return CompanyAdministrators(self)
 
     def is_owner_or_administrator(self, user):
-        return self.owner == user or user in self.administrators.all()
+        return is_owner_or_administrator(user, self.id)
 
     class Meta:
         verbose_name_plural = "Companies"
+        indexes = [
+            models.Index(fields=['is_visible', 'created_at', 'id'], name='company_visible_created_idx'),
+        ]
+
+
+class Membership(models.Model):
+    ROLE_CHOICES = [(OWNER, 'Owner'), (ADMINISTRATOR, 'Administrator'), (MEMBER, 'Member')]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default=MEMBER)
+    joined_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'user'], name='unique_company_membership'),
+        ]
+        indexes = [
+            models.Index(fields=['company', 'role'], name='membership_company_role_idx'),
+            models.Index(fields=['user', 'role'], name='membership_user_role_idx'),
+        ]
+
+
+@receiver(post_init, sender=Company)
+def remember_loaded_owner(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred owner is not loaded for every row
+    instance._loaded_owner_id = instance.__dict__.get('owner_id', DEFERRED)
 
 
+@receiver(pre_delete, sender=Company)
+def invalidate_company_roles(sender, instance, **kwargs):
+    # The membership rows are removed by the cascade, which does not send m2m_changed
+    user_ids = set(Membership.objects.filter(company=instance).values_list('user_id', flat=True))
+    invalidate_user_roles(user_ids | {instance.owner_id})
 
- 
\ No newline at end of file
+
+@receiver(m2m_changed, sender=Membership)
+def invalidate_membership_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear', 'post_clear'):
+        return
+
+    if reverse:
+        invalidate_user_roles([instance.pk])
+    elif action == 'pre_clear':
+        instance._cleared_user_ids = list(
+            sender.objects.filter(company_id=instance.pk).values_list('user_id', flat=True)
+        )
+    elif action == 'post_clear':
+        invalidate_user_roles(getattr(instance, '_cleared_user_ids', []))
+    else:
+        invalidate_user_roles(pk_set)
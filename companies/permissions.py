@@ -0,0 +1,14 @@
+from rest_framework import permissions
+
+from .roles import is_owner_or_administrator
+
+
+def _company_id(obj):
+    return obj.company_id if hasattr(obj, 'company_id') else obj.pk
+
+
+class IsCompanyOwnerOrAdministrator(permissions.BasePermission):
+    message = 'Permission denied'
+
+    def has_object_permission(self, request, view, obj):
+        return is_owner_or_administrator(request.user, _company_id(obj))
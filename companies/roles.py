@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+
+OWNER = 'owner'
+ADMINISTRATOR = 'administrator'
+MEMBER = 'member'
+
+USER_ROLES_TTL = 3600
+
+
+def user_roles_key(user_id):
+    return f'company_roles:{user_id}'
+
+
+def load_user_roles(user_id):
+    from .models import Company, Membership
+
+    roles = {}
+    for company_id, role in Membership.objects.filter(user_id=user_id).values_list('company_id', 'role'):
+        roles.setdefault(company_id, set()).add(role)
+    # The owner column stays authoritative even if the owner's membership row was removed
+    for company_id in Company.objects.filter(owner_id=user_id).values_list('id', flat=True):
+        roles.setdefault(company_id, set()).add(OWNER)
+    return roles
+
+
+def get_user_roles(user_id):
+    # {company_id: {roles}} for every company the user belongs to, cached until a membership changes
+    key = user_roles_key(user_id)
+    roles = cache.get(key)
+    if roles is None:
+        roles = load_user_roles(user_id)
+        cache.set(key, roles, USER_ROLES_TTL)
+    return roles
+
+
+def invalidate_user_roles(user_ids):
+    keys = [user_roles_key(user_id) for user_id in user_ids]
+    if not keys:
+        return
+    cache.delete_many(keys)
+
+    # Again once the change is visible, a reader in between could have cached the old roles
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_company_roles(user, company_id):
+    if user is None or not user.is_authenticated:
+        return set()
+    return get_user_roles(user.id).get(company_id, set())
+
+
+def is_owner_or_administrator(user, company_id):
+    return bool(get_company_roles(user, company_id) & {OWNER, ADMINISTRATOR})
+
+
+def is_member(user, company_id):
+    return bool(get_company_roles(user, company_id))
@@ -4,6 +4,9 @@ from companies.models import Company
 
 
 class CompanySerializer(serializers.ModelSerializer):
+    members = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    administrators = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
     class Meta:
         model = Company
         fields = ['id', 'owner', 'name', 'description', 'members', 'administrators']
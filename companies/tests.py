@@ -1,9 +1,12 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
 from accounts.models import CustomUser
-from companies.models import Company
+from companies.models import Company, Membership
+from companies.roles import is_member, is_owner_or_administrator
 
 
 class CompanyViewSetTest(APITestCase):
@@ -25,6 +28,25 @@ class CompanyViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 4)
 
+    def test_list_is_keyset_paginated_without_count(self):
+        for i in range(3):
+            Company.objects.create(name=f'Company {i}', description='Desc', owner=self.user, is_visible=True)
+        Company.objects.create(name='Hidden', description='Desc', owner=self.user, is_visible=False)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/company/', {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['count'])
+        self.assertEqual([company['name'] for company in response.data['results']], ['Company 0', 'Company 1'])
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([company['name'] for company in response.data['results']], ['Company 2'])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get('/company/', {'count': 'estimate'})
+        self.assertIsInstance(response.data['count'], int)
+
     def test_create(self):
         data = {
             'name': 'testCompany',
@@ -81,4 +103,74 @@ class CompanyViewSetTest(APITestCase):
         self.assertFalse(company.administrators.filter(id=self.user1.id).exists())
         
 
-        
\ No newline at end of file
+        
+    def test_role_checks_are_cached_and_invalidated_by_membership_changes(self):
+        company = Company.objects.create(name='Company', description='Desc', owner=self.user, is_visible=True)
+        company.members.add(self.user1)
+        url = f'/company/{company.id}/get-results/'
+
+        self.client.force_authenticate(self.user1)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(is_member(self.user1, company.id))
+            self.assertFalse(is_owner_or_administrator(self.user1, company.id))
+        self.assertEqual(len(queries), 0)
+
+        company.administrators.add(self.user1)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        company.administrators.remove(self.user1)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        company.members.clear()
+        self.assertFalse(is_member(self.user1, company.id))
+
+        company.owner = self.user1
+        company.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_membership_rows_hold_one_role_per_user(self):
+        company = Company.objects.create(name='Company', description='Desc', owner=self.user, is_visible=True)
+        company.members.add(self.user1, self.user2)
+        company.administrators.add(self.user1)
+
+        self.assertEqual(
+            dict(Membership.objects.filter(company=company).values_list('user__username', 'role')),
+            {'testuser': 'owner', 'user1': 'administrator', 'user2': 'member'},
+        )
+        self.assertEqual(set(company.administrators.values_list('id', flat=True)), {self.user.id, self.user1.id})
+
+        with CaptureQueriesContext(connection) as queries:
+            company.name = 'Renamed'
+            company.save()
+        self.assertFalse(any('companies_membership' in query['sql'] for query in queries))
+
+        company.administrators.remove(self.user1)
+        self.assertEqual(Membership.objects.get(company=company, user=self.user1).role, 'member')
+
+    def test_deferred_owner_is_not_loaded_per_row(self):
+        for i in range(5):
+            Company.objects.create(name=f'Company {i}', owner=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            companies = list(Company.objects.only('id', 'name'))
+        self.assertEqual(len(queries), 1)
+
+        company = companies[0]
+        company.owner = self.user1
+        company.save()
+        self.assertEqual(Membership.objects.get(company=company, user=self.user1).role, 'owner')
+        self.assertEqual(Membership.objects.get(company=company, user=self.user).role, 'administrator')
+
+    def test_owner_cannot_be_removed_from_members(self):
+        company = Company.objects.create(name='Company', description='Desc', owner=self.user, is_visible=True)
+
+        response = self.client.post(f'/company/{company.id}/remove_member/', {'user_id': self.user.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'The owner cannot be removed from the company')
+
+        response = self.client.post(f'/users/{self.user.id}/leave_company/', {'company_id': company.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'The owner cannot leave the company')
+        self.assertEqual(Membership.objects.get(company=company, user=self.user).role, 'owner')
@@ -1,34 +1,35 @@
 import csv
+from datetime import timedelta
 
-from django.db.models import Prefetch
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery
 from django.http import HttpResponse
+from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
 from accounts.models import CustomUser
 from accounts.serializers import UserSerializer
 from companies.models import Company
+from companies.permissions import IsCompanyOwnerOrAdministrator
 from companies.serializers import (
     AdministratorSerializer,
     AppointAdministratorSerializer,
     CompanySerializer,
     RemoveAdministratorSerializer,
 )
+from core.pagination import KeysetPagination
 from invitations.models import CompanyInvitation, InvitationStatus
 from invitations.serializers import AcceptRequestSerializer, RemoveMemberSerializer, SendInvitationSerializer
-from quizzes.models import Quiz, QuizResult, UserAnswer
-from quizzes.serializers import QuizResultSerializer, QuizSerializer
+from quizzes.analytics import member_average_scores, quiz_activity_summary
+from quizzes.models import Quiz, QuizResult
+from quizzes.serializers import QuizResultSerializer, QuizSummarySerializer
 
 
-class CompanyPagination(PageNumberPagination):
-    page_size = 10
-
 class CompanyViewSet(viewsets.ModelViewSet):
     serializer_class = CompanySerializer
     queryset = Company.objects.prefetch_related('owner').all()
-    pagination_class = CompanyPagination
+    pagination_class = KeysetPagination
     
     
     def perform_create(self, serializer):
@@ -52,7 +53,7 @@ class CompanyViewSet(viewsets.ModelViewSet):
             queryset = self.filter_queryset(self.get_queryset())
             page = self.paginate_queryset(queryset.filter(is_visible=True))
 
-            if page:
+            if page is not None:
                 serializer = self.get_serializer(page, many=True)
                 return self.get_paginated_response(serializer.data)
             
@@ -187,6 +188,9 @@ class CompanyViewSet(viewsets.ModelViewSet):
             user_id = serializer.validated_data['user_id']
             
             if company.members.filter(id=user_id).exists():
+                if company.owner_id == user_id:
+                    return Response({'error': 'The owner cannot be removed from the company'},
+                                    status=status.HTTP_400_BAD_REQUEST)
                 company.members.remove(user_id)
                 return Response({'message': 'Member removed successfully'}, status=status.HTTP_200_OK)
             else:
@@ -207,10 +211,8 @@ class CompanyViewSet(viewsets.ModelViewSet):
             company = self.get_object()
             user_id = serializer.validated_data['user_id']
             try:
-                user = CustomUser.objects.filter(pk=user_id).prefetch_related(
-                    'companies', 
-                    'administered_companies').first()
-                if user in company.members.all() and user != company.owner:
+                user = CustomUser.objects.filter(pk=user_id).first()
+                if user is not None and company.members.filter(id=user.id).exists() and user != company.owner:
                     company.administrators.add(user)
                     return Response({'message': 'Administrator appointed successfully'}, status=status.HTTP_200_OK)
                 return Response({'error': 'Invalid user or action not allowed'}, status=status.HTTP_400_BAD_REQUEST)
@@ -228,10 +230,8 @@ class CompanyViewSet(viewsets.ModelViewSet):
             user_id = serializer.validated_data['user_id']
 
             try:
-                user = CustomUser.objects.filter(pk=user_id).prefetch_related(
-                    'companies', 
-                    'administered_companies').first()
-                if user in company.administrators.all():
+                user = CustomUser.objects.filter(pk=user_id).first()
+                if user is not None and user != company.owner and company.administrators.filter(id=user.id).exists():
                     company.administrators.remove(user)
                     return Response({'message': 'Administrator removed successfully'}, status=status.HTTP_200_OK)
                 return Response({'error': 'User is not an administrator'}, status=status.HTTP_400_BAD_REQUEST)
@@ -250,58 +250,55 @@ class CompanyViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'], url_path='list-quizzes')
     def list_quizzes(self, request, pk=None):
         company = self.get_object()
-        quizzes = Quiz.objects.filter(company=company)
-        serializer = QuizSerializer(quizzes, many=True)
+        quizzes = Quiz.objects.filter(company=company).annotate(question_count=Count('questions')).order_by('id')
+        serializer = QuizSummarySerializer(quizzes, many=True)
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'], url_path='average_score')
     def company_average_user_score(self, request, pk=None):
         company = self.get_object() 
 
+        user_ids = request.query_params.get('user_ids')
+        if user_ids is not None:
+            user_ids = user_ids.split(',')
+            if not all(user_id.isdigit() for user_id in user_ids):
+                return Response({'error': 'user_ids must be a comma separated list of ids'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            averages = member_average_scores(company.id, [int(user_id) for user_id in user_ids])
+            return Response({
+                'company_id': company.id,
+                'average_scores': [
+                    {'user_id': user_id, 'average_score': average} for user_id, average in averages.items()
+                ],
+            }, status=status.HTTP_200_OK)
+
         user_id = request.query_params.get('user_id', None)
         if user_id is None:
             return Response({'error': 'user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not user_id.isdigit():
+            return Response({'error': 'user_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
 
-        company_with_results = Company.objects.prefetch_related(
-            'members__quizresult_set',  
-        ).get(id=company.id)
-
-        user = company_with_results.members.get(id=user_id)
-        quiz_results = user.quizresult_set.all()
-
-        total_correct_answers = UserAnswer.objects.filter(
-            quiz_attempt__user=user,
-            question__quiz__company=company,
-            chosen_answer__is_correct=True
-        ).count()
-
-        total_answers = UserAnswer.objects.filter(
-            quiz_attempt__user=user,
-            question__quiz__company=company
-        ).count()
-
-        average_score = total_correct_answers / total_answers if total_answers > 0 else 0
+        averages = member_average_scores(company.id, [int(user_id)])
+        if int(user_id) not in averages:
+            return Response({'error': 'User is not a member of this company'}, status=status.HTTP_404_NOT_FOUND)
 
+        quiz_results = QuizResult.objects.filter(company=company, user_id=user_id)
         quiz_results_serializer = QuizResultSerializer(quiz_results, many=True)
 
         response_data = {
             'company_id': company.id,
             'user_id': user_id,
-            'average_score': average_score,
-            'quiz_results': quiz_results_serializer.data,  
+            'average_score': averages[int(user_id)],
+            'quiz_results': quiz_results_serializer.data,
         }
 
         return Response(response_data, status=status.HTTP_200_OK)
 
-    @action(detail=True, methods=['get'], url_path='get-results')
+    @action(detail=True, methods=['get'], url_path='get-results',
+            permission_classes=[IsCompanyOwnerOrAdministrator])
     def get_company_results(self, request, pk=None):
-        user = request.user
-
         company = self.get_object()
 
-        if not company.is_owner_or_administrator(user):
-            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-
         prefetch_query = Prefetch('quiz', queryset=Quiz.objects.select_related('company'))
         quiz_results = QuizResult.objects.filter(quiz__company=company).prefetch_related(prefetch_query, 'user')
 
@@ -309,12 +306,11 @@ class CompanyViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    @action(detail=True, methods=['get'], url_path='member-results')
+    @action(detail=True, methods=['get'], url_path='member-results',
+            permission_classes=[IsCompanyOwnerOrAdministrator])
     def get_member_results(self, request, pk=None):
         try:
             company = self.get_object()
-            if not company.is_owner_or_administrator(request.user):
-                return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
             user_id = request.GET.get('user_id') 
 
             quiz_results = QuizResult.objects.filter(
@@ -333,11 +329,10 @@ class CompanyViewSet(viewsets.ModelViewSet):
         except CustomUser.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    @action(detail=True, methods=['get'], url_path='member-results/export-csv')
+    @action(detail=True, methods=['get'], url_path='member-results/export-csv',
+            permission_classes=[IsCompanyOwnerOrAdministrator])
     def export_member_results_to_csv(self, request, pk=None):
         company = self.get_object()
-        if not company.is_owner_or_administrator(request.user):
-            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         user_id = request.GET.get('user_id')  
 
         quiz_results = QuizResult.objects.filter(
@@ -364,11 +359,10 @@ class CompanyViewSet(viewsets.ModelViewSet):
             
         return response
 
-    @action(detail=True, methods=['get'], url_path='member-results/export-json')
+    @action(detail=True, methods=['get'], url_path='member-results/export-json',
+            permission_classes=[IsCompanyOwnerOrAdministrator])
     def export_member_results_to_json(self, request, pk=None):
         company = self.get_object()
-        if not company.is_owner_or_administrator(request.user):
-            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         user_id = request.GET.get('user_id')  
 
         quiz_results = QuizResult.objects.filter(
@@ -382,41 +376,52 @@ class CompanyViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.data)
 
-    @action(detail=True, methods=['get'], url_path='recent-quiz-completions')
+    @action(detail=True, methods=['get'], url_path='recent-quiz-completions',
+            permission_classes=[IsCompanyOwnerOrAdministrator])
     def get_recent_quiz_completions(self, request, pk=None):
         company = self.get_object()
-        if not company.is_owner_or_administrator(request.user):
-            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-
-        quizzes = Quiz.objects.prefetch_related('company').filter(company=company)
-        quiz_data = []
 
-        for quiz in quizzes:
-            if QuizResult.objects.filter(quiz=quiz).exists():
-                last_completion_time = QuizResult.objects.filter(quiz=quiz).latest('timestamp').timestamp  
-            else: 
-                last_completion_time = None
-            quiz_data.append({
-                'quiz_title': quiz.title,
-                'last_completion_time': last_completion_time,
-            })
+        return Response([
+            {'quiz_title': row['quiz_title'], 'last_completion_time': row['last_completion_time']}
+            for row in quiz_activity_summary(company.id)
+        ])
 
-        return Response(quiz_data)
+    @action(detail=True, methods=['get'], url_path='quiz-activity',
+            permission_classes=[IsCompanyOwnerOrAdministrator])
+    def get_quiz_activity(self, request, pk=None):
+        company = self.get_object()
+        return Response(quiz_activity_summary(company.id))
 
-    @action(detail=True, methods=['get'], url_path='users-last-test-time')
+    @action(detail=True, methods=['get'], url_path='users-last-test-time',
+            permission_classes=[IsCompanyOwnerOrAdministrator])
     def get_users_last_test_time(self, request, pk=None):
         company = self.get_object()
-        company_users = company.members.all()
-        users_last_test_time = []
-
-        for user in company_users:
-            last_test_time = QuizResult.objects.prefetch_related(
-                'company', 
-                'user').filter(user=user, company=company).order_by('-timestamp').first()
-            users_last_test_time.append({
+
+        # Latest result per member from the (company, user, -timestamp) index, all in the same query
+        last_test_time = (
+            QuizResult.objects
+            .filter(company=company, user=OuterRef('pk'))
+            .order_by('-timestamp')
+            .values('timestamp')[:1]
+        )
+        members = company.members.only('id', 'username').annotate(last_test_time=Subquery(last_test_time))
+
+        inactive_days = request.query_params.get('inactive_days')
+        if inactive_days is not None:
+            if not inactive_days.isdigit():
+                return Response({'error': 'inactive_days must be a whole number'}, status=status.HTTP_400_BAD_REQUEST)
+            cutoff = timezone.now() - timedelta(days=int(inactive_days))
+            members = members.filter(Q(last_test_time__isnull=True) | Q(last_test_time__lt=cutoff))
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(members, request, view=self)
+        users_last_test_time = [
+            {
                 'user_id': user.id,
                 'username': user.username,
-                'last_test_time': last_test_time.timestamp if last_test_time else None,
-            })
+                'last_test_time': user.last_test_time,
+            }
+            for user in page
+        ]
 
-        return Response(users_last_test_time)
\ No newline at end of file
+        return paginator.get_paginated_response(users_last_test_time)
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import CustomUser
+from companies.models import Company
+from invitations.models import CompanyInvitation, InvitationStatus
+from notifications.models import Notification, NotificationStatus
+from quizzes.models import Quiz, QuizResult, UserAnswer
+
+DISABLE_INDEXES = (
+    'SET LOCAL enable_indexscan = off',
+    'SET LOCAL enable_indexonlyscan = off',
+    'SET LOCAL enable_bitmapscan = off',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Print the query plans of the hot QuizResult, UserAnswer, CompanyInvitation and Notification lookups, '
+        'with indexes disabled and enabled, to check that they no longer fall back to sequential scans'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help='Run EXPLAIN ANALYZE and report real timings')
+        parser.add_argument('--indexed-only', action='store_true', help='Skip the plans with indexes disabled')
+
+    def handle(self, *args, **options):
+        user = CustomUser.objects.order_by('id').first()
+        quiz = Quiz.objects.order_by('id').first()
+        company = Company.objects.order_by('id').first()
+        if not (user and quiz and company):
+            self.stderr.write('Need at least one user, company and quiz to build sample queries')
+            return
+
+        queries = {
+            'QuizResult by (user, quiz) latest first': (
+                QuizResult.objects.filter(user=user, quiz=quiz).order_by('-timestamp')[:1]
+            ),
+            'QuizResult by (company, user) latest first': (
+                QuizResult.objects.filter(company=company, user=user).order_by('-timestamp')[:1]
+            ),
+            'QuizResult by quiz latest first': QuizResult.objects.filter(quiz=quiz).order_by('-timestamp')[:1],
+            'UserAnswer by (quiz_attempt, question)': UserAnswer.objects.filter(
+                quiz_attempt__in=quiz.quizattempt_set.values('id')[:1],
+            ).order_by('question'),
+            'CompanyInvitation by (company, status)': CompanyInvitation.objects.filter(
+                company=company, status=InvitationStatus.INVITED.value,
+            ),
+            'CompanyInvitation by (invited_user, status)': CompanyInvitation.objects.filter(
+                invited_user=user, status=InvitationStatus.REQUESTED.value,
+            ),
+            'Notification by (user, status) newest first': Notification.objects.filter(
+                user=user, status=NotificationStatus.UNREAD.value,
+            ).order_by('-created_at')[:20],
+        }
+
+        for title, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            if not options['indexed_only']:
+                self.stdout.write(self.style.WARNING('-- indexes disabled'))
+                self.stdout.write(self.explain(queryset, options['analyze'], disable_indexes=True))
+            self.stdout.write(self.style.SUCCESS('-- indexes enabled'))
+            self.stdout.write(self.explain(queryset, options['analyze'], disable_indexes=False))
+            self.stdout.write('')
+
+    def explain(self, queryset, analyze, disable_indexes):
+        with transaction.atomic():
+            if disable_indexes:
+                with connection.cursor() as cursor:
+                    for statement in DISABLE_INDEXES:
+                        cursor.execute(statement)
+            plan = queryset.explain(analyze=analyze)
+            # Never keep anything EXPLAIN ANALYZE may have touched
+            transaction.set_rollback(True)
+        return plan
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.5 on 2026-10-17 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invitations', '0005_alter_companyinvitation_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='companyinvitation',
+            index=models.Index(fields=['company', 'status'], name='invitation_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companyinvitation',
+            index=models.Index(fields=['invited_user', 'status'], name='invitation_user_status_idx'),
+        ),
+    ]
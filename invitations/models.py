@@ -23,3 +23,7 @@ class CompanyInvitation(models.Model):
     
     class Meta:
         verbose_name_plural = "CompanyInvites"
+        indexes = [
+            models.Index(fields=['company', 'status'], name='invitation_company_status_idx'),
+            models.Index(fields=['invited_user', 'status'], name='invitation_user_status_idx'),
+        ]
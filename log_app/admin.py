@@ -1,2 +1,13 @@
+from django.contrib import admin
 
-# Register your models here.
+from .models import Logger
+
+
+@admin.register(Logger)
+class LoggerAdmin(admin.ModelAdmin):
+    list_display = ('timestamp', 'level', 'message')
+    list_filter = ('level',)
+    date_hierarchy = 'timestamp'
+    ordering = ('-timestamp',)
+    # Counting the whole table on every page load defeats the indexes
+    show_full_result_count = False
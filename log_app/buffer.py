@@ -0,0 +1,65 @@
+import json
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Logger
+
+LOG_BUFFER_KEY = 'log_app:buffer'
+FLUSH_SCHEDULED_KEY = 'log_app:flush_scheduled'
+LEVEL_MAX_LENGTH = Logger._meta.get_field('level').max_length
+
+
+def _build_record(level, message):
+    return {'level': str(level)[:LEVEL_MAX_LENGTH], 'message': str(message), 'timestamp': timezone.now().isoformat()}
+
+
+def _to_logger(record):
+    return Logger(level=record['level'], message=record['message'], timestamp=parse_datetime(record['timestamp']))
+
+
+def buffer_log_record(level, message):
+    record = _build_record(level, message)
+    connection = settings.REDIS_CONNECTION
+    try:
+        buffered = connection.rpush(LOG_BUFFER_KEY, json.dumps(record))
+    except redis.RedisError:
+        # Losing the buffer must not lose the line, fall back to writing it directly
+        _to_logger(record).save()
+        return
+
+    # Only the push that crosses the size threshold schedules a flush, the beat task covers the rest
+    if buffered >= settings.LOG_BUFFER_FLUSH_SIZE and connection.set(
+        FLUSH_SCHEDULED_KEY, 1, nx=True, ex=settings.LOG_BUFFER_FLUSH_INTERVAL
+    ):
+        from .tasks import flush_log_buffer
+        flush_log_buffer.delay()
+
+
+def pop_log_records(count):
+    pipeline = settings.REDIS_CONNECTION.pipeline()
+    pipeline.lrange(LOG_BUFFER_KEY, 0, count - 1)
+    pipeline.ltrim(LOG_BUFFER_KEY, count, -1)
+    records, _ = pipeline.execute()
+    return [json.loads(record) for record in records]
+
+
+def flush_log_buffer(batch_size=None):
+    batch_size = batch_size or settings.LOG_BUFFER_FLUSH_SIZE
+    connection = settings.REDIS_CONNECTION
+    connection.delete(FLUSH_SCHEDULED_KEY)
+
+    flushed = 0
+    while True:
+        records = pop_log_records(batch_size)
+        if not records:
+            return flushed
+        try:
+            Logger.objects.bulk_create([_to_logger(record) for record in records])
+        except Exception:
+            # Put the batch back at the head so the next flush retries it in order
+            connection.lpush(LOG_BUFFER_KEY, *reversed([json.dumps(record) for record in records]))
+            raise
+        flushed += len(records)
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from log_app.models import Logger
+
+
+class Command(BaseCommand):
+    help = 'Delete log lines older than the given number of days in primary key ranges'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batch_size = options['batch_size']
+        expired = Logger.objects.filter(timestamp__lt=cutoff)
+
+        # Lines are appended in time order, so everything expired sits below one id and the
+        # deletes walk the primary key in ranges instead of rescanning the table per batch
+        boundary = expired.aggregate(last_id=Max('id'))['last_id']
+        if boundary is None:
+            self.stdout.write(self.style.SUCCESS('Nothing to prune'))
+            return
+
+        first_id = Logger.objects.order_by('id').values_list('id', flat=True).first()
+        deleted = 0
+        for start in range(first_id - 1, boundary, batch_size):
+            count, _ = expired.filter(id__gt=start, id__lte=min(start + batch_size, boundary)).delete()
+            deleted += count
+
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} log lines older than {cutoff:%Y-%m-%d %H:%M}'))
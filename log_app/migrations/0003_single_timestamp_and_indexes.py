@@ -0,0 +1,36 @@
+# Generated by Django 4.2.5 on 2026-10-17 20:45
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('log_app', '0002_remove_logger_actions_remove_logger_user_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='logger',
+            name='created_at',
+        ),
+        migrations.RemoveField(
+            model_name='logger',
+            name='updated_at',
+        ),
+        migrations.AlterField(
+            model_name='logger',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='logger',
+            index=models.Index(fields=['level', 'timestamp'], name='logger_level_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logger',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['timestamp'], name='logger_ts_brin'),
+        ),
+    ]
@@ -1,11 +1,10 @@
-from django.conf import settings
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
+from django.utils import timezone
 
-from core.models import TimeStampedModel
 
-User = settings.AUTH_USER_MODEL
-class Logger(TimeStampedModel):
-    timestamp = models.DateTimeField(auto_now_add=True)
+class Logger(models.Model):
+    timestamp = models.DateTimeField(default=timezone.now)
     level = models.CharField(max_length=20, default = 'INFO')
     message = models.TextField(default = "")
 
@@ -13,4 +12,9 @@ class Logger(TimeStampedModel):
     def __str__(self):
         return f'{self.timestamp} - {self.level}: {self.message}'
 
-    
\ No newline at end of file
+    class Meta:
+        indexes = [
+            models.Index(fields=['level', 'timestamp'], name='logger_level_ts_idx'),
+            # Rows are appended in time order, so a BRIN index covers time ranges at a fraction of the size
+            BrinIndex(fields=['timestamp'], name='logger_ts_brin'),
+        ]
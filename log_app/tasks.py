@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from . import buffer
+
+
+@shared_task
+def flush_log_buffer():
+    return buffer.flush_log_buffer()
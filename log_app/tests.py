@@ -1,2 +1,86 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import CustomUser
+from accounts.utils import log_to_logger
+
+from .buffer import FLUSH_SCHEDULED_KEY, LOG_BUFFER_KEY, flush_log_buffer
+from .models import Logger
+
+
+class LogBufferTestCase(APITestCase):
+    def setUp(self):
+        settings.REDIS_CONNECTION.delete(LOG_BUFFER_KEY, FLUSH_SCHEDULED_KEY)
+        self.addCleanup(settings.REDIS_CONNECTION.delete, LOG_BUFFER_KEY, FLUSH_SCHEDULED_KEY)
+
+    def test_log_lines_are_buffered_and_flushed_in_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            for i in range(5):
+                log_to_logger('INFO', f'Line {i}')
+        self.assertEqual(len(queries), 0)
+        self.assertFalse(Logger.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(flush_log_buffer(batch_size=10), 5)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('INSERT')]), 1)
+        self.assertEqual(
+            list(Logger.objects.order_by('timestamp').values_list('message', flat=True)),
+            [f'Line {i}' for i in range(5)],
+        )
+        self.assertEqual(settings.REDIS_CONNECTION.llen(LOG_BUFFER_KEY), 0)
+
+    @override_settings(LOG_BUFFER_FLUSH_SIZE=2)
+    def test_size_threshold_schedules_a_single_flush(self):
+        with mock.patch('log_app.tasks.flush_log_buffer.delay') as delay:
+            for i in range(4):
+                log_to_logger('ERROR', f'Line {i}')
+        delay.assert_called_once_with()
+
+
+class LoggerReadAndPruneTestCase(APITestCase):
+    def setUp(self):
+        now = timezone.now()
+        Logger.objects.bulk_create(
+            [Logger(level='INFO', message=f'Old {i}', timestamp=now - timedelta(days=100 - i)) for i in range(3)]
+            + [Logger(level='ERROR', message=f'Recent {i}', timestamp=now - timedelta(hours=3 - i)) for i in range(3)]
+            + [Logger(level='INFO', message='Recent info', timestamp=now)]
+        )
+        self.admin = CustomUser.objects.create(username="admin", is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    def test_logs_are_filtered_by_level_and_time_window(self):
+        response = self.client.get('/logs/', {
+            'level': 'error',
+            'from': (timezone.now() - timedelta(days=1)).isoformat().replace('+00:00', 'Z'),
+            'page_size': 2,
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([log['message'] for log in response.data['results']], ['Recent 2', 'Recent 1'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([log['message'] for log in response.data['results']], ['Recent 0'])
+
+        response = self.client.get('/logs/', {'from': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_logs_require_staff(self):
+        self.client.force_authenticate(CustomUser.objects.create(username="user"))
+        self.assertEqual(self.client.get('/logs/').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_prune_logs_deletes_only_expired_lines(self):
+        out = StringIO()
+        call_command('prune_logs', '--days', 30, '--batch-size', 2, stdout=out)
+
+        self.assertIn('Pruned 3 log lines', out.getvalue())
+        self.assertFalse(Logger.objects.filter(message__startswith='Old').exists())
+        self.assertEqual(Logger.objects.count(), 4)
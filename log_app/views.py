@@ -1,2 +1,38 @@
+from django.utils.dateparse import parse_datetime
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
 
-# Create your views here.
+from core.pagination import KeysetPagination
+
+from .models import Logger
+from .serializers import LoggerSerializer
+
+
+class LoggerPagination(KeysetPagination):
+    page_size = 100
+    max_page_size = 1000
+    ordering = ('-timestamp', '-id')
+
+
+class LoggerViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Logger.objects.all()
+    serializer_class = LoggerSerializer
+    pagination_class = LoggerPagination
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+
+        if params.get('level'):
+            queryset = queryset.filter(level=params['level'].upper())
+
+        for param, lookup in (('from', 'timestamp__gte'), ('to', 'timestamp__lt')):
+            if params.get(param):
+                value = parse_datetime(params[param])
+                if value is None:
+                    raise ValidationError({param: 'Must be an ISO 8601 datetime'})
+                queryset = queryset.filter(**{lookup: value})
+
+        return queryset
@@ -122,6 +122,8 @@ CACHES = {
     }
 }
 
+QUIZ_ANSWER_KEY_LRU_SIZE = int(os.environ.get('QUIZ_ANSWER_KEY_LRU_SIZE', 512))
+
 REDIS_HOST = os.environ.get('REDIS_HOST', socket.gethostbyname('redis'))
 REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
 
@@ -133,7 +135,11 @@ REDIS_CONNECTION = redis.StrictRedis(
 
 CHANNEL_LAYERS = {
     'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',  # Use Redis or other channel layers in production.
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {
+            'hosts': [f'redis://{REDIS_HOST}:{REDIS_PORT}/2'],
+            'capacity': int(os.environ.get('CHANNEL_LAYER_CAPACITY', 1000)),
+        },
     },
 }
 
@@ -210,9 +216,29 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Buffered log lines are written once this many are queued, or by the beat task every interval seconds
+LOG_BUFFER_FLUSH_SIZE = int(os.environ.get('LOG_BUFFER_FLUSH_SIZE', 500))
+LOG_BUFFER_FLUSH_INTERVAL = int(os.environ.get('LOG_BUFFER_FLUSH_INTERVAL', 10))
+
 CELERY_BEAT_SCHEDULE = {
     'check-last-test-dates': {
-        'task': 'quizzes.tasks.check_last_test_dates',
+        'task': 'quizzes.tasks.check_and_notify_users',
         'schedule': timedelta(hours=24),
     },
-}
\ No newline at end of file
+    'flush-log-buffer': {
+        'task': 'log_app.tasks.flush_log_buffer',
+        'schedule': timedelta(seconds=LOG_BUFFER_FLUSH_INTERVAL),
+    },
+    'purge-expired-notifications': {
+        'task': 'notifications.tasks.purge_expired_notifications',
+        'schedule': timedelta(hours=1),
+    },
+}
+
+# Days a notification stays in the hot table; read ones are deleted, unread ones are moved to the archive
+NOTIFICATION_RETENTION_DAYS = {
+    'read': int(os.environ.get('NOTIFICATION_READ_RETENTION_DAYS', 30)),
+    'unread': int(os.environ.get('NOTIFICATION_UNREAD_RETENTION_DAYS', 180)),
+}
+NOTIFICATION_RETENTION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_RETENTION_BATCH_SIZE', 1000))
+NOTIFICATION_RETENTION_MAX_BATCHES = int(os.environ.get('NOTIFICATION_RETENTION_MAX_BATCHES', 200))
\ No newline at end of file
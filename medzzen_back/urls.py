@@ -21,12 +21,14 @@ from rest_framework.routers import DefaultRouter
 
 from accounts.views import UserViewSet
 from companies.views import CompanyViewSet
+from log_app.views import LoggerViewSet
 from quizzes.views import QuizViewSet
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
 router.register(r'company', CompanyViewSet)
 router.register(r'quizzes', QuizViewSet)
+router.register(r'logs', LoggerViewSet)
 
 
 
@@ -3,10 +3,26 @@ import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 
 
+def user_group_name(user_id):
+    return f'user_{user_id}'
+
+
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        # Every worker delivers to the same group through the shared channel layer
+        self.group_name = user_group_name(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
     async def receive(self, text_data):
         data = json.loads(text_data)
         message = data['message']
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from notifications.models import Notification, NotificationStatus
+from notifications.retention import LAST_RUN_CACHE_KEY, retention_cutoff, run_retention, table_sizes
+
+
+class Command(BaseCommand):
+    help = 'Report notification table sizes, rows past their retention and the throughput of the last purge'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--purge', action='store_true', help='Run a retention pass now and report it')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--max-batches', type=int)
+
+    def handle(self, *args, **options):
+        for table, size in sorted(table_sizes().items()):
+            self.stdout.write(
+                f'{table}: ~{size["estimated_rows"]} rows, {size["total_bytes"] / 1024 / 1024:.1f} MiB'
+            )
+
+        for notification_status in NotificationStatus:
+            expired = Notification.objects.filter(
+                status=notification_status.value,
+                created_at__lt=retention_cutoff(notification_status.value),
+            ).count()
+            self.stdout.write(f'{notification_status.value} past retention: {expired}')
+
+        if options['purge']:
+            stats = run_retention(options['batch_size'], options['max_batches'])
+        else:
+            stats = cache.get(LAST_RUN_CACHE_KEY)
+
+        if stats is None:
+            self.stdout.write('No retention run recorded yet')
+            return
+
+        removed = stats['deleted'] + stats['archived']
+        throughput = removed / stats['seconds'] if stats['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Run finished {stats["finished_at"]}: {stats["deleted"]} deleted, {stats["archived"]} archived '
+            f'in {stats["batches"]} batches, {stats["seconds"]}s ({throughput:.0f} rows/s)'
+        ))
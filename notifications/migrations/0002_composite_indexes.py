@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-17 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'status', '-created_at'], name='notification_user_status_idx'),
+        ),
+    ]
@@ -15,10 +15,24 @@ class Notification(models.Model):
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
-    def mark_as_read(self):
-        self.status = NotificationStatus.READ.value
-        self.save()
-
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status', '-created_at'], name='notification_user_status_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='notification_status_ts_idx'),
+        ]
+
+
+class ArchivedNotification(models.Model):
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=[(status.value, status.name) for status in NotificationStatus])
+    text = models.TextField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='archived_notif_user_idx'),
+        ]
 
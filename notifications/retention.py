@@ -0,0 +1,100 @@
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ArchivedNotification, Notification, NotificationStatus
+from .utils import adjust_unread_counts
+
+LAST_RUN_CACHE_KEY = 'notification_retention:last_run'
+
+
+def retention_cutoff(status, now=None):
+    return (now or timezone.now()) - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS[status])
+
+
+def _expired_batch(status, cutoff, batch_size):
+    # Walks the (status, created_at) index from the oldest row
+    return (
+        Notification.objects
+        .filter(status=status, created_at__lt=cutoff)
+        .order_by('created_at')[:batch_size]
+    )
+
+
+def delete_read_batch(cutoff, batch_size):
+    ids = list(_expired_batch(NotificationStatus.READ.value, cutoff, batch_size).values_list('id', flat=True))
+    if not ids:
+        return 0
+    deleted, _ = Notification.objects.filter(id__in=ids).delete()
+    return deleted
+
+
+def archive_unread_batch(cutoff, batch_size):
+    with transaction.atomic():
+        # Locked so a concurrent mark-read waits for the move, rows it already holds are left for the next batch
+        notifications = list(
+            _expired_batch(NotificationStatus.UNREAD.value, cutoff, batch_size).select_for_update(skip_locked=True)
+        )
+        if not notifications:
+            return 0
+
+        ArchivedNotification.objects.bulk_create([
+            ArchivedNotification(
+                user_id=notification.user_id,
+                status=notification.status,
+                text=notification.text,
+                created_at=notification.created_at,
+            )
+            for notification in notifications
+        ])
+        Notification.objects.filter(
+            id__in=[notification.id for notification in notifications], status=NotificationStatus.UNREAD.value
+        ).delete()
+
+    adjust_unread_counts({
+        user_id: -count for user_id, count in Counter(n.user_id for n in notifications).items()
+    })
+    return len(notifications)
+
+
+def run_retention(batch_size=None, max_batches=None, now=None):
+    batch_size = batch_size or settings.NOTIFICATION_RETENTION_BATCH_SIZE
+    max_batches = max_batches or settings.NOTIFICATION_RETENTION_MAX_BATCHES
+    read_cutoff = retention_cutoff(NotificationStatus.READ.value, now)
+    unread_cutoff = retention_cutoff(NotificationStatus.UNREAD.value, now)
+
+    started = time.monotonic()
+    stats = {'deleted': 0, 'archived': 0, 'batches': 0}
+
+    # Small batches keep each statement short so the table stays writable while it is trimmed
+    for key, purge, cutoff in (
+        ('deleted', delete_read_batch, read_cutoff),
+        ('archived', archive_unread_batch, unread_cutoff),
+    ):
+        while stats['batches'] < max_batches:
+            removed = purge(cutoff, batch_size)
+            if not removed:
+                break
+            stats[key] += removed
+            stats['batches'] += 1
+
+    stats['seconds'] = round(time.monotonic() - started, 3)
+    stats['finished_at'] = timezone.now().isoformat()
+    cache.set(LAST_RUN_CACHE_KEY, stats, None)
+    return stats
+
+
+def table_sizes():
+    tables = (Notification._meta.db_table, ArchivedNotification._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT relname, reltuples::bigint, pg_total_relation_size(oid) '
+            'FROM pg_class WHERE relname = ANY(%s)',
+            [list(tables)],
+        )
+        return {name: {'estimated_rows': rows, 'total_bytes': size} for name, rows, size in cursor.fetchall()}
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .retention import run_retention
+
+
+@shared_task
+def purge_expired_notifications():
+    return run_retention()
@@ -1,2 +1,180 @@
+import json
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import CustomUser
+
+from .consumers import NotificationConsumer, user_group_name
+from .models import ArchivedNotification, Notification, NotificationStatus
+from .retention import run_retention
+from .utils import get_unread_count, send_notifications_to_users, unread_count_key
+
+
+class NotificationDeliveryTestCase(APITestCase):
+    def setUp(self):
+        self.users = CustomUser.objects.bulk_create([CustomUser(username=f"user{i}") for i in range(3)])
+        self.channel_layer = get_channel_layer()
+        self.addCleanup(async_to_sync(self.channel_layer.flush))
+
+    def test_send_notifications_to_users_reaches_each_user_group(self):
+        channels = {}
+        for user in self.users:
+            channel = async_to_sync(self.channel_layer.new_channel)()
+            async_to_sync(self.channel_layer.group_add)(user_group_name(user.id), channel)
+            channels[user.id] = channel
+
+        send_notifications_to_users([user.id for user in self.users], text='Text', message='Message')
+
+        self.assertEqual(Notification.objects.filter(user__in=self.users, text='Text').count(), 3)
+        for channel in channels.values():
+            event = async_to_sync(self.channel_layer.receive)(channel)
+            self.assertEqual(event['type'], 'send_notification')
+            self.assertEqual(json.loads(event['message']), {'type': 'notification', 'message': 'Message'})
+
+
+class NotificationConsumerTestCase(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username="user")
+        self.channel_layer = get_channel_layer()
+        self.addCleanup(async_to_sync(self.channel_layer.flush))
+
+    def communicator(self, user):
+        communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), '/ws/notifications/')
+        communicator.scope['user'] = user
+        return communicator
+
+    def test_anonymous_socket_is_closed(self):
+        async def connect():
+            connected, _ = await self.communicator(AnonymousUser()).connect()
+            return connected
+
+        self.assertFalse(async_to_sync(connect)())
+
+    def test_socket_joins_user_group(self):
+        async def connect_and_receive():
+            communicator = self.communicator(self.user)
+            connected, _ = await communicator.connect()
+            await self.channel_layer.group_send(
+                user_group_name(self.user.id), {'type': 'send_notification', 'message': 'hello'}
+            )
+            received = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return connected, received
+
+        connected, received = async_to_sync(connect_and_receive)()
+        self.assertTrue(connected)
+        self.assertEqual(received, {'message': 'hello'})
+
+
+class NotificationListTestCase(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username="user")
+        settings.REDIS_CONNECTION.delete(unread_count_key(self.user.id))
+        self.client.force_authenticate(self.user)
+        for i in range(5):
+            send_notifications_to_users([self.user.id], text=f'Text {i}', message='Message')
+
+    def test_get_notifications_pages_and_marks_page_read(self):
+        url = f'/users/{self.user.id}/get_notifications/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([n['text'] for n in response.data['results']], ['Text 4', 'Text 3', 'Text 2'])
+        self.assertTrue(all(n['status'] == NotificationStatus.UNREAD.value for n in response.data['results']))
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE')]), 1)
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([n['text'] for n in response.data['results']], ['Text 1', 'Text 0'])
+        self.assertIsNone(response.data['next'])
+        self.assertFalse(Notification.objects.filter(user=self.user, status=NotificationStatus.UNREAD.value).exists())
+
+    def test_mark_read_up_to_and_unread_count(self):
+        count_url = f'/users/{self.user.id}/notifications/unread-count/'
+        self.assertEqual(self.client.get(count_url).data['unread_count'], 5)
+
+        third = Notification.objects.get(user=self.user, text='Text 2')
+        response = self.client.post(f'/users/{self.user.id}/notifications/mark-read/', {'up_to': third.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['marked_read'], 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(count_url)
+        self.assertEqual(response.data['unread_count'], 2)
+        self.assertFalse(any('notifications_notification' in query['sql'] for query in queries))
+
+        send_notifications_to_users([self.user.id], text='Text 5', message='Message')
+        self.assertEqual(self.client.get(count_url).data['unread_count'], 3)
+
+        response = self.client.post(f'/users/{self.user.id}/notifications/mark-read/')
+        self.assertEqual(response.data['marked_read'], 3)
+        self.assertEqual(self.client.get(count_url).data['unread_count'], 0)
+
+
+    def test_notification_endpoints_are_limited_to_the_account_owner(self):
+        other = CustomUser.objects.create(username="other")
+        urls = [
+            ('get', f'/users/{self.user.id}/get_notifications/'),
+            ('post', f'/users/{self.user.id}/notifications/mark-read/'),
+            ('get', f'/users/{self.user.id}/notifications/unread-count/'),
+        ]
+
+        for user in (None, other):
+            self.client.force_authenticate(user)
+            for method, url in urls:
+                response = getattr(self.client, method)(url)
+                self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.assertEqual(Notification.objects.filter(user=self.user, status=NotificationStatus.UNREAD.value).count(), 5)
+
+class NotificationRetentionTestCase(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username="user")
+        settings.REDIS_CONNECTION.delete(unread_count_key(self.user.id))
+
+    def _create(self, notification_status, days_old, count):
+        notifications = Notification.objects.bulk_create([
+            Notification(user=self.user, status=notification_status.value, text=f'{days_old} days old')
+            for _ in range(count)
+        ])
+        Notification.objects.filter(id__in=[n.id for n in notifications]).update(
+            created_at=timezone.now() - timedelta(days=days_old)
+        )
+
+    def test_retention_deletes_read_and_archives_unread_in_batches(self):
+        self._create(NotificationStatus.READ, 60, 5)
+        self._create(NotificationStatus.READ, 1, 2)
+        self._create(NotificationStatus.UNREAD, 365, 3)
+        self._create(NotificationStatus.UNREAD, 60, 1)
+        self.assertEqual(get_unread_count(self.user.id), 4)
+
+        stats = run_retention(batch_size=2)
+
+        self.assertEqual(stats['deleted'], 5)
+        self.assertEqual(stats['archived'], 3)
+        self.assertEqual(stats['batches'], 5)
+        self.assertEqual(Notification.objects.filter(status=NotificationStatus.READ.value).count(), 2)
+        self.assertEqual(Notification.objects.filter(status=NotificationStatus.UNREAD.value).count(), 1)
+        self.assertEqual(ArchivedNotification.objects.filter(user=self.user, text='365 days old').count(), 3)
+        self.assertEqual(get_unread_count(self.user.id), 1)
+
+    def test_retention_respects_batch_limit_and_reports(self):
+        self._create(NotificationStatus.READ, 60, 5)
+
+        out = StringIO()
+        call_command('notification_retention_report', '--purge', '--batch-size', 2, '--max-batches', 1, stdout=out)
+
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertIn('read past retention: 5', out.getvalue())
+        self.assertIn('2 deleted, 0 archived in 1 batches', out.getvalue())
@@ -1,18 +1,71 @@
+import asyncio
 import json
+from collections import Counter
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from django.conf import settings
 
+from .consumers import user_group_name
 from .models import Notification, NotificationStatus
 
+GROUP_SEND_BATCH_SIZE = 500
+UNREAD_COUNT_TTL = 24 * 3600
 
-def send_notification_to_user(user, quiz, message_type='notification'):
-    channel_layer = get_channel_layer()
-    Notification.objects.create(
-        user=user,
-        status=NotificationStatus.UNREAD.value,
-        text=f'An undone quiz "{quiz.title}" is available. Take it now!',
+# Counters are only adjusted while they exist, a missing one is rebuilt from the table on read
+_INCR_IF_EXISTS = settings.REDIS_CONNECTION.register_script(
+    "if redis.call('exists', KEYS[1]) == 1 then return redis.call('incrby', KEYS[1], ARGV[1]) end"
+)
+
+
+def unread_count_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def adjust_unread_counts(deltas):
+    pipeline = settings.REDIS_CONNECTION.pipeline(transaction=False)
+    for user_id, delta in deltas.items():
+        _INCR_IF_EXISTS(keys=[unread_count_key(user_id)], args=[delta], client=pipeline)
+    pipeline.execute()
+
+
+def get_unread_count(user_id):
+    redis = settings.REDIS_CONNECTION
+    key = unread_count_key(user_id)
+    count = redis.get(key)
+    if count is not None:
+        return int(count)
+
+    count = Notification.objects.filter(user_id=user_id, status=NotificationStatus.UNREAD.value).count()
+    redis.set(key, count, ex=UNREAD_COUNT_TTL, nx=True)
+    return count
+
+
+def mark_notifications_read(user_id, notifications):
+    updated = (
+        notifications
+        .filter(user_id=user_id, status=NotificationStatus.UNREAD.value)
+        .update(status=NotificationStatus.READ.value)
     )
-    message = json.dumps({'type': message_type, 'message': f'New quiz "{quiz.title}" is available. Take it now!'})
-    async_to_sync(channel_layer.group_add)(f'user_{user.id}', f'notification_group_{user.id}')
-    async_to_sync(channel_layer.group_send)(f'user_{user.id}', {'type': 'send_notification', 'message': message})
+    if updated:
+        adjust_unread_counts({user_id: -updated})
+    return updated
+
+
+async def group_send_many(channel_layer, groups, event):
+    # The sends of a batch share the layer's connection pool and overlap their round trips
+    for start in range(0, len(groups), GROUP_SEND_BATCH_SIZE):
+        batch = groups[start:start + GROUP_SEND_BATCH_SIZE]
+        await asyncio.gather(*(channel_layer.group_send(group, event) for group in batch))
+
+
+def send_notifications_to_users(user_ids, text, message, message_type='notification'):
+    # One INSERT for the whole batch and one event loop entry for all the channel pushes
+    Notification.objects.bulk_create([
+        Notification(user_id=user_id, status=NotificationStatus.UNREAD.value, text=text)
+        for user_id in user_ids
+    ])
+    adjust_unread_counts(Counter(user_ids))
+
+    event = {'type': 'send_notification', 'message': json.dumps({'type': message_type, 'message': message})}
+    async_to_sync(group_send_many)(get_channel_layer(), [user_group_name(user_id) for user_id in user_ids], event)
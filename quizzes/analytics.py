@@ -0,0 +1,150 @@
+from django.core.cache import cache
+from django.db.models import Count, DateField, F, FilteredRelation, Func, Max, Q, Sum, Window
+from django.db.models.functions import Trunc
+from django.utils.dateparse import parse_date
+
+from companies.models import Membership
+
+from .cache import company_activity_key
+from .models import Quiz
+
+BUCKETS = ('day', 'week', 'month')
+COMPANY_ACTIVITY_TTL = 600
+
+
+class RunningSum(Func):
+    # SUM(...) that may wrap an aggregate when used as a window: SUM(COUNT(x)) OVER (ORDER BY ...)
+    function = 'SUM'
+    window_compatible = True
+
+
+def _parse_day(value, name):
+    day = parse_date(value) if value else None
+    if value and day is None:
+        raise ValueError(f'{name} must be a date in YYYY-MM-DD format')
+    return day
+
+
+def parse_time_series_params(query_params):
+    bucket = query_params.get('bucket', 'day')
+    if bucket not in BUCKETS:
+        raise ValueError(f'bucket must be one of: {", ".join(BUCKETS)}')
+
+    date_from = _parse_day(query_params.get('from'), 'from')
+    date_to = _parse_day(query_params.get('to'), 'to')
+    if date_from and date_to and date_from > date_to:
+        raise ValueError('from must not be after to')
+
+    return date_from, date_to, bucket
+
+
+def _filter_range(rollups, date_from, date_to):
+    if date_from:
+        rollups = rollups.filter(date__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(date__lte=date_to)
+    return rollups
+
+
+def _cumulative_rows(rollups, group_by, bucket):
+    partition_by = [F(field) for field in group_by] or None
+
+    return (
+        rollups
+        .annotate(bucket_date=Trunc('date', bucket, output_field=DateField()))
+        .values(*group_by, 'bucket_date')
+        .annotate(correct_answers=Sum('correct_count'), total_answers=Sum('total_count'))
+        .annotate(
+            cumulative_correct=Window(
+                RunningSum(Sum('correct_count')), partition_by=partition_by, order_by=F('bucket_date').asc()
+            ),
+            cumulative_total=Window(
+                RunningSum(Sum('total_count')), partition_by=partition_by, order_by=F('bucket_date').asc()
+            ),
+        )
+        .order_by(*group_by, 'bucket_date')
+    )
+
+
+def _point(row):
+    return {
+        'date': row['bucket_date'],
+        'average_score': float(row['cumulative_correct']) / float(row['cumulative_total'])
+        if row['cumulative_total'] else 0,
+    }
+
+
+def score_time_series(rollups, date_from=None, date_to=None, bucket='day'):
+    # rollups is a DailyScoreRollup queryset; the whole curve comes back from one grouped query
+    rows = _cumulative_rows(_filter_range(rollups, date_from, date_to), [], bucket)
+    return [_point(row) for row in rows]
+
+
+def score_time_series_by_user(rollups, date_from=None, date_to=None, bucket='day'):
+    # One grouped query over (user, date), the running sums are partitioned per user
+    rows = _cumulative_rows(_filter_range(rollups, date_from, date_to), ['user_id'], bucket)
+
+    curves = {}
+    for row in rows:
+        curves.setdefault(row['user_id'], []).append(_point(row))
+    return curves
+
+
+def average_score(quiz_results):
+    # Plain sums over the counters stored on QuizResult, rows scored before them are skipped
+    totals = quiz_results.aggregate(correct=Sum('correct_count'), total=Sum('question_count'))
+    return totals['correct'] / totals['total'] if totals['total'] else 0
+
+
+def member_average_scores(company_id, user_ids):
+    # {user_id: average} for the given users that are members; the company condition sits in the
+    # results join, so only this company's rows are read through the (company, user) index
+    rows = (
+        Membership.objects
+        .filter(company_id=company_id, user_id__in=user_ids)
+        .annotate(company_results=FilteredRelation(
+            'user__quizresult', condition=Q(user__quizresult__company_id=company_id),
+        ))
+        .values('user_id')
+        .annotate(correct=Sum('company_results__correct_count'), total=Sum('company_results__question_count'))
+        .order_by('user_id')
+    )
+    return {row['user_id']: row['correct'] / row['total'] if row['total'] else 0 for row in rows}
+
+
+def load_quiz_activity(company_id):
+    # One grouped query over the company's quizzes and their results
+    rows = (
+        Quiz.objects
+        .filter(company_id=company_id)
+        .annotate(
+            last_completion_time=Max('quizresult__timestamp'),
+            completions=Count('quizresult'),
+            distinct_takers=Count('quizresult__user', distinct=True),
+            correct=Sum('quizresult__correct_count'),
+            total=Sum('quizresult__question_count'),
+        )
+        .values('id', 'title', 'last_completion_time', 'completions', 'distinct_takers', 'correct', 'total')
+        .order_by('id')
+    )
+    return [
+        {
+            'quiz_id': row['id'],
+            'quiz_title': row['title'],
+            'last_completion_time': row['last_completion_time'],
+            'completions': row['completions'],
+            'distinct_takers': row['distinct_takers'],
+            'average_score': row['correct'] / row['total'] if row['total'] else 0,
+        }
+        for row in rows
+    ]
+
+
+def quiz_activity_summary(company_id):
+    # Cached per company until a result is recorded or a quiz is added or removed
+    key = company_activity_key(company_id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = load_quiz_activity(company_id)
+        cache.set(key, summary, COMPANY_ACTIVITY_TTL)
+    return summary
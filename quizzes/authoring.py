@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from companies.models import Company
+
+from .cache import bump_quiz_version, invalidate_company_activity
+from .models import Answer, Question, Quiz, notify_company_members
+from .serializers import QuizImportSerializer
+
+IMPORT_CHUNK_SIZE = 200
+CSV_COLUMNS = ('quiz_title', 'quiz_description', 'frequency_in_days', 'company', 'question', 'answer', 'is_correct')
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 't')
+
+
+def bulk_create_questions(quizzes_with_questions):
+    # quizzes_with_questions: [(quiz, [{'text': ..., 'answers': [{'text': ..., 'is_correct': ...}]}])]
+    pending = [
+        (Question(quiz=quiz, text=question_data['text']), question_data.get('answers', []))
+        for quiz, questions_data in quizzes_with_questions
+        for question_data in questions_data
+    ]
+    questions = Question.objects.bulk_create([question for question, _ in pending])
+
+    answers = Answer.objects.bulk_create([
+        Answer(question=question, text=answer_data['text'], is_correct=answer_data.get('is_correct', False))
+        for question, (_, answers_data) in zip(questions, pending)
+        for answer_data in answers_data
+    ])
+
+    # bulk_create skips post_save, so the quiz caches have to be told explicitly
+    for quiz, _ in quizzes_with_questions:
+        bump_quiz_version(quiz.id)
+
+    return questions, answers
+
+
+def bulk_create_quizzes(quizzes_data):
+    quizzes = Quiz.objects.bulk_create([
+        Quiz(
+            title=quiz_data['title'],
+            description=quiz_data['description'],
+            frequency_in_days=quiz_data['frequency_in_days'],
+            company_id=quiz_data['company'],
+        )
+        for quiz_data in quizzes_data
+    ])
+    questions, answers = bulk_create_questions(
+        [(quiz, quiz_data['questions']) for quiz, quiz_data in zip(quizzes, quizzes_data)]
+    )
+    for company_id in {quiz.company_id for quiz in quizzes}:
+        invalidate_company_activity(company_id)
+    return quizzes, questions, answers
+
+
+def iter_quizzes_from_json(uploaded_file):
+    try:
+        quizzes_data = json.load(uploaded_file)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValidationError({'file': [f'Invalid JSON: {e}']})
+    if not isinstance(quizzes_data, list):
+        raise ValidationError({'file': ['Expected a JSON list of quizzes.']})
+    yield from quizzes_data
+
+
+def iter_quizzes_from_json_lines(uploaded_file):
+    # One quiz object per line, so only the current quiz is held in memory
+    for line_number, line in enumerate(uploaded_file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValidationError({'file': [f'Invalid JSON on line {line_number}: {e}']})
+
+
+def iter_quizzes_from_csv(uploaded_file):
+    try:
+        yield from _iter_csv_quizzes(uploaded_file)
+    except UnicodeDecodeError as e:
+        raise ValidationError({'file': [f'CSV must be UTF-8 encoded: {e}']})
+
+
+def _iter_csv_quizzes(uploaded_file):
+    # One row per answer; consecutive rows with the same quiz and question are grouped together
+    reader = csv.DictReader(io.TextIOWrapper(uploaded_file, encoding='utf-8'))
+    missing = set(CSV_COLUMNS) - set(reader.fieldnames or [])
+    if missing:
+        raise ValidationError({'file': [f'Missing CSV columns: {", ".join(sorted(missing))}']})
+
+    quiz_data = None
+    for row in reader:
+        quiz_key = (row['quiz_title'], row['company'])
+        if quiz_data is None or quiz_key != (quiz_data['title'], quiz_data['company']):
+            if quiz_data is not None:
+                yield quiz_data
+            quiz_data = {
+                'title': row['quiz_title'],
+                'description': row['quiz_description'],
+                'frequency_in_days': row['frequency_in_days'],
+                'company': row['company'],
+                'questions': [],
+            }
+
+        questions = quiz_data['questions']
+        if not questions or questions[-1]['text'] != row['question']:
+            questions.append({'text': row['question'], 'answers': []})
+        if row['answer']:
+            questions[-1]['answers'].append({
+                'text': row['answer'],
+                'is_correct': row['is_correct'].strip().lower() in TRUE_VALUES,
+            })
+
+    if quiz_data is not None:
+        yield quiz_data
+
+
+def import_quizzes(uploaded_file, user):
+    name = uploaded_file.name.lower()
+    if name.endswith('.csv'):
+        quizzes_data = iter_quizzes_from_csv(uploaded_file)
+    elif name.endswith(('.jsonl', '.ndjson')):
+        quizzes_data = iter_quizzes_from_json_lines(uploaded_file)
+    else:
+        quizzes_data = iter_quizzes_from_json(uploaded_file)
+
+    totals = {'quizzes_created': 0, 'questions_created': 0, 'answers_created': 0}
+    allowed_companies = {}
+    created_quizzes = []
+
+    def flush(chunk):
+        company_ids = {quiz_data['company'] for quiz_data in chunk} - set(allowed_companies)
+        for company in Company.objects.filter(id__in=company_ids).select_related('owner'):
+            allowed_companies[company.id] = company.is_owner_or_administrator(user)
+        denied = sorted(
+            company_id for company_id in {quiz_data['company'] for quiz_data in chunk}
+            if not allowed_companies.get(company_id)
+        )
+        if denied:
+            raise ValidationError({'company': [f'Cannot create quizzes for companies: {denied}']})
+
+        quizzes, questions, answers = bulk_create_quizzes(chunk)
+        created_quizzes.extend(quizzes)
+        totals['quizzes_created'] += len(quizzes)
+        totals['questions_created'] += len(questions)
+        totals['answers_created'] += len(answers)
+
+    with transaction.atomic():
+        chunk = []
+        for index, quiz_data in enumerate(quizzes_data):
+            serializer = QuizImportSerializer(data=quiz_data)
+            if not serializer.is_valid():
+                raise ValidationError({'quiz': index, 'errors': serializer.errors})
+            chunk.append(serializer.validated_data)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+
+        for quiz in created_quizzes:
+            notify_company_members(quiz)
+
+    return totals
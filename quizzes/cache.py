@@ -0,0 +1,78 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Outlives the entries cached under a version, an expired token only costs one re-render
+QUIZ_VERSION_TTL = 7 * 24 * 3600
+
+
+def quiz_version_key(quiz_id):
+    return f'quiz_version:{quiz_id}'
+
+
+def get_quiz_version(quiz_id):
+    # Versions are random tokens rather than counters, so an evicted version key can never
+    # resurrect entries that were cached under an older version of the same quiz.
+    return cache.get_or_set(quiz_version_key(quiz_id), lambda: uuid.uuid4().hex, QUIZ_VERSION_TTL)
+
+
+def peek_quiz_version(quiz_id):
+    return cache.get(quiz_version_key(quiz_id))
+
+
+def _set_quiz_version(quiz_id):
+    cache.set(quiz_version_key(quiz_id), uuid.uuid4().hex, QUIZ_VERSION_TTL)
+
+
+def bump_quiz_version(quiz_id):
+    _set_quiz_version(quiz_id)
+
+    # Bump again once the change is visible to other connections, otherwise a reader could
+    # cache the pre-commit rows under the new version.
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _set_quiz_version(quiz_id))
+
+
+def delete_quiz_version(quiz_id):
+    cache.delete(quiz_version_key(quiz_id))
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: cache.delete(quiz_version_key(quiz_id)))
+
+
+def company_activity_key(company_id):
+    return f'company_quiz_activity:{company_id}'
+
+
+def invalidate_company_activity(company_id):
+    cache.delete(company_activity_key(company_id))
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: cache.delete(company_activity_key(company_id)))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, When
+from django.db.models.functions import Cast, Coalesce
+
+from quizzes.models import QuizResult
+from quizzes.utils import attempt_question_count
+
+
+class Command(BaseCommand):
+    help = 'Fill correct_count, question_count and score_ratio on QuizResult rows scored before they existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        pending = QuizResult.objects.filter(question_count__isnull=True)
+        last_id = 0
+        updated = 0
+
+        while True:
+            ids = list(pending.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+
+            with transaction.atomic():
+                chunk = QuizResult.objects.filter(id__in=ids)
+                chunk.update(question_count=Coalesce(attempt_question_count(), 0))
+                # Without a known total the old score cannot count as correct answers
+                chunk.update(
+                    correct_count=Case(
+                        When(question_count__gt=0, then=Cast('score', IntegerField())),
+                        default=0,
+                        output_field=IntegerField(),
+                    ),
+                )
+                chunk.update(
+                    score_ratio=Case(
+                        When(question_count__gt=0, then=Cast('correct_count', FloatField()) / F('question_count')),
+                        default=0.0,
+                        output_field=FloatField(),
+                    )
+                )
+
+            updated += len(ids)
+            last_id = ids[-1]
+            self.stdout.write(f'Backfilled {updated} results, last id {last_id}')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {updated} results backfilled'))
@@ -0,0 +1,78 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quizzes.utils import COMPANY_FIELD, USER_ANSWER_TTL, pack_answer, user_answers_key
+
+LEGACY_PATTERN = 'user_answer:*'
+
+
+class Command(BaseCommand):
+    help = 'Convert legacy user_answer:{user}:{quiz}:{question} keys into one hash per (user, quiz) attempt'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        redis = settings.REDIS_CONNECTION
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        converted = 0
+        batch = []
+        for key in redis.scan_iter(match=LEGACY_PATTERN, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                converted += self.convert_batch(redis, batch, dry_run)
+                batch = []
+        if batch:
+            converted += self.convert_batch(redis, batch, dry_run)
+
+        action = 'Would convert' if dry_run else 'Converted'
+        self.stdout.write(self.style.SUCCESS(f'{action} {converted} legacy answer keys'))
+
+    def convert_batch(self, redis, keys, dry_run):
+        pipeline = redis.pipeline(transaction=False)
+        for key in keys:
+            pipeline.get(key)
+            pipeline.ttl(key)
+        results = pipeline.execute()
+
+        hashes = defaultdict(lambda: {'mapping': {}, 'ttl': 0})
+        legacy_keys = []
+        for key, value, ttl in zip(keys, results[::2], results[1::2]):
+            if value is None:
+                # Expired between SCAN and GET
+                continue
+
+            _, user_id, quiz_id, question_id = key.split(':')
+            data = json.loads(value)
+
+            entry = hashes[user_answers_key(user_id, quiz_id)]
+            entry['mapping'][question_id] = pack_answer(data['answer'], data['is_correct'])
+            if data.get('company_id') is not None:
+                entry['mapping'][COMPANY_FIELD] = data['company_id']
+            entry['ttl'] = max(entry['ttl'], ttl if ttl > 0 else USER_ANSWER_TTL)
+            legacy_keys.append(key)
+
+        if dry_run or not legacy_keys:
+            return len(legacy_keys)
+
+        pipeline = redis.pipeline(transaction=False)
+        for hash_key in hashes:
+            pipeline.ttl(hash_key)
+        current_ttls = pipeline.execute()
+
+        # Answers already written in the new layout are newer than the legacy ones, so only fill gaps
+        pipeline = redis.pipeline()
+        for (hash_key, entry), current_ttl in zip(hashes.items(), current_ttls):
+            for field, value in entry['mapping'].items():
+                pipeline.hsetnx(hash_key, field, value)
+            pipeline.expire(hash_key, max(entry['ttl'], current_ttl))
+        pipeline.delete(*legacy_keys)
+        pipeline.execute()
+
+        return len(legacy_keys)
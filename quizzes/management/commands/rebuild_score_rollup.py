@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser
+from quizzes.rollup import rebuild_daily_rollup_for_users
+
+
+class Command(BaseCommand):
+    help = 'Backfill or rebuild the DailyScoreRollup table from QuizResult rows, a chunk of users at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--start-after', type=int, default=0, help='Resume after this user id')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_user_id = options['start_after']
+        total_rows = 0
+
+        while True:
+            user_ids = list(
+                CustomUser.objects
+                .filter(id__gt=last_user_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                break
+
+            rows = rebuild_daily_rollup_for_users(user_ids)
+            total_rows += rows
+            last_user_id = user_ids[-1]
+            self.stdout.write(f'Rebuilt {rows} rollup rows for users up to id {last_user_id}')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {total_rows} rollup rows written'))
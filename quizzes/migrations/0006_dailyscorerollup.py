@@ -0,0 +1,36 @@
+# Generated by Django 4.2.5 on 2026-10-17 20:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('companies', '0012_alter_company_administrators'),
+        ('quizzes', '0005_alter_quizresult_quiz_attempt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyScoreRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('correct_count', models.PositiveIntegerField(default=0)),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='companies.company')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quizzes.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='rollup_user_date_idx'), models.Index(fields=['quiz', 'user', 'date'], name='rollup_quiz_user_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyscorerollup',
+            constraint=models.UniqueConstraint(fields=('company', 'quiz', 'user', 'date'), name='unique_daily_score_rollup'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.5 on 2026-10-17 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0006_dailyscorerollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizresult',
+            name='correct_count',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='quizresult',
+            name='question_count',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='quizresult',
+            name='score_ratio',
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.5 on 2026-10-17 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0007_quizresult_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['user', 'quiz', '-timestamp'], name='result_user_quiz_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['company', 'user', '-timestamp'], include=('correct_count', 'question_count'), name='result_company_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['quiz', '-timestamp'], name='result_quiz_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useranswer',
+            index=models.Index(fields=['quiz_attempt', 'question'], name='useranswer_attempt_q_idx'),
+        ),
+    ]
@@ -1,12 +1,13 @@
 
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from accounts.models import CustomUser
 from companies.models import Company
 from core.models import TimeStampedModel
-from notifications.utils import send_notification_to_user
+
+from .cache import bump_quiz_version, delete_quiz_version, invalidate_company_activity
 
 
 class Quiz(TimeStampedModel):
@@ -19,7 +20,12 @@ class Quiz(TimeStampedModel):
     def __str__(self):
         return self.title
 
-    
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='quiz_created_id_idx'),
+        ]
+
+
 class Question(TimeStampedModel):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='questions')
     text = models.TextField()
@@ -46,7 +52,21 @@ class QuizResult(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE, default=None)
     timestamp = models.DateTimeField(auto_now_add=True)
     score = models.FloatField()
-    quiz_attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE)
+    quiz_attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, null=True)
+    correct_count = models.PositiveIntegerField(null=True)
+    question_count = models.PositiveIntegerField(null=True)
+    score_ratio = models.FloatField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'quiz', '-timestamp'], name='result_user_quiz_ts_idx'),
+            models.Index(
+                fields=['company', 'user', '-timestamp'],
+                name='result_company_user_ts_idx',
+                include=['correct_count', 'question_count'],
+            ),
+            models.Index(fields=['quiz', '-timestamp'], name='result_quiz_ts_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.company_id and self.quiz:
@@ -62,14 +82,86 @@ class UserAnswer(models.Model):
     class Meta:
         verbose_name = "User Answer"
         verbose_name_plural = "User Answers"
+        indexes = [
+            models.Index(fields=['quiz_attempt', 'question'], name='useranswer_attempt_q_idx'),
+        ]
 
     def __str__(self):
         return f"User Answer for Question '{self.question}' in Quiz Attempt '{self.quiz_attempt}'"
 
+class DailyScoreRollup(models.Model):
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    date = models.DateField()
+    correct_count = models.PositiveIntegerField(default=0)
+    total_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'quiz', 'user', 'date'], name='unique_daily_score_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date'], name='rollup_user_date_idx'),
+            models.Index(fields=['quiz', 'user', 'date'], name='rollup_quiz_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} / {self.quiz} on {self.date}: {self.correct_count}/{self.total_count}"
+
+
+def notify_company_members(quiz):
+    # The fan-out runs in Celery once the quiz is committed, members are notified in chunks there
+    from .tasks import fan_out_quiz_notifications
+
+    transaction.on_commit(lambda: fan_out_quiz_notifications.delay(quiz.id))
+
 
 @receiver(post_save, sender=Quiz)
-def create_quiz_notifications(sender, instance, **kwargs):
-    company_users = instance.company.members.all()
+def create_quiz_notifications(sender, instance, created, **kwargs):
+    if created:
+        notify_company_members(instance)
+
+
+@receiver(post_save, sender=Quiz)
+def invalidate_quiz_cache(sender, instance, **kwargs):
+    bump_quiz_version(instance.id)
+    invalidate_company_activity(instance.company_id)
+
+
+@receiver(post_delete, sender=Quiz)
+def drop_quiz_cache(sender, instance, **kwargs):
+    # Nothing can be cached for a deleted quiz, so its token is removed rather than replaced
+    delete_quiz_version(instance.id)
+    invalidate_company_activity(instance.company_id)
+
+
+# Save only, a delete receiver would stop results being bulk-deleted with their quiz or company,
+# whose own receivers already drop the summary
+@receiver(post_save, sender=QuizResult)
+def invalidate_company_activity_for_result(sender, instance, **kwargs):
+    invalidate_company_activity(instance.company_id)
+
+
+def started_delete(origin, model):
+    # origin is the instance or queryset whose delete() began the cascade
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    return origin_model is model
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_quiz_cache_for_question(sender, instance, origin=None, **kwargs):
+    # Rows removed with their quiz are covered once by the quiz's own receiver
+    if origin is not None and not started_delete(origin, Question):
+        return
+    bump_quiz_version(instance.quiz_id)
+
 
-    for user in company_users:
-        send_notification_to_user(user, instance, message_type='notification')
\ No newline at end of file
+@receiver([post_save, post_delete], sender=Answer)
+def invalidate_quiz_cache_for_answer(sender, instance, origin=None, **kwargs):
+    # Rows removed with their question or quiz are covered by that parent's receiver
+    if origin is not None and not started_delete(origin, Answer):
+        return
+    quiz_id = Question.objects.filter(id=instance.question_id).values_list('quiz_id', flat=True).first()
+    if quiz_id is not None:
+        bump_quiz_version(quiz_id)
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from .cache import get_quiz_version, peek_quiz_version
+from .models import Quiz
+from .serializers import QuizSerializer
+
+QUIZ_DETAIL_TTL = 24 * 3600
+
+
+def quiz_etag(quiz_id, version):
+    return f'"{quiz_id}-{version}"'
+
+
+def etag_matches(etag, if_none_match):
+    # If-None-Match uses the weak comparison, a compressing proxy may have marked our tag W/
+    candidates = parse_etags(if_none_match)
+    return '*' in candidates or etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in candidates}
+
+
+def get_existing_quiz_version(quiz_id):
+    # A token is only created for a quiz that exists, so probing unknown ids leaves nothing behind
+    version = peek_quiz_version(quiz_id)
+    if version is None and Quiz.objects.filter(id=quiz_id).exists():
+        version = get_quiz_version(quiz_id)
+    return version
+
+
+def render_quiz_detail(quiz_id):
+    quiz = Quiz.objects.prefetch_related('questions__answers').filter(id=quiz_id).first()
+    if quiz is None:
+        return None
+    return JSONRenderer().render(QuizSerializer(quiz).data)
+
+
+def get_quiz_detail(quiz_id, version=None):
+    # Stored as rendered bytes keyed by the quiz version, so any change to the quiz,
+    # its questions or answers misses and the next read renders it again
+    version = version or get_quiz_version(quiz_id)
+    cache_key = f'quiz_detail:{quiz_id}:{version}'
+    payload = cache.get(cache_key)
+    if payload is None:
+        payload = render_quiz_detail(quiz_id)
+        if payload is not None:
+            cache.set(cache_key, payload, QUIZ_DETAIL_TTL)
+    return payload
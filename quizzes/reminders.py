@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from companies.models import Membership
+
+from .models import QuizResult
+
+
+def membership_chunk_bounds(chunk_size):
+    # Yields (start_after, end) id ranges of the membership table, end is None for the last chunk
+    memberships = Membership.objects.order_by('id').values_list('id', flat=True)
+    start_after = 0
+    while True:
+        end = memberships.filter(id__gt=start_after)[chunk_size - 1:chunk_size].first()
+        if end is None:
+            if memberships.filter(id__gt=start_after).exists():
+                yield start_after, None
+            return
+        yield start_after, end
+        start_after = end
+
+
+def overdue_pairs(start_after=0, end=None, now=None):
+    # Every (member, company quiz) pair whose latest result is older than the quiz frequency
+    now = now or timezone.now()
+    memberships = Membership.objects.filter(id__gt=start_after, company__quiz__isnull=False)
+    if end is not None:
+        memberships = memberships.filter(id__lte=end)
+
+    last_taken = (
+        QuizResult.objects
+        .filter(user_id=OuterRef('user_id'), quiz_id=OuterRef('company__quiz__id'))
+        .order_by('-timestamp')
+        .values('timestamp')[:1]
+    )
+    frequency = ExpressionWrapper(
+        F('company__quiz__frequency_in_days') * timedelta(days=1), output_field=DurationField()
+    )
+
+    return (
+        memberships
+        .annotate(
+            quiz_id=F('company__quiz__id'),
+            quiz_title=F('company__quiz__title'),
+            last_taken=Subquery(last_taken),
+        )
+        .annotate(due_at=ExpressionWrapper(F('last_taken') + frequency, output_field=DateTimeField()))
+        .filter(Q(last_taken__isnull=True) | Q(due_at__lte=now))
+        .values('user_id', 'quiz_id', 'quiz_title')
+        .order_by('quiz_id', 'user_id')
+    )
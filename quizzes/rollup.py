@@ -0,0 +1,80 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Sum, When
+from django.db.models.functions import Cast, Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import DailyScoreRollup, QuizResult
+from .utils import attempt_question_count
+
+
+def add_to_daily_rollup(company_id, quiz_id, user_id, date, correct_count, total_count):
+    lookup = {'company_id': company_id, 'quiz_id': quiz_id, 'user_id': user_id, 'date': date}
+    increments = {
+        'correct_count': F('correct_count') + correct_count,
+        'total_count': F('total_count') + total_count,
+    }
+
+    if DailyScoreRollup.objects.filter(**lookup).update(**increments):
+        return
+
+    try:
+        with transaction.atomic():
+            DailyScoreRollup.objects.create(**lookup, correct_count=correct_count, total_count=total_count)
+    except IntegrityError:
+        # Another submission created the row between our UPDATE and INSERT
+        DailyScoreRollup.objects.filter(**lookup).update(**increments)
+
+
+def record_quiz_result(quiz_result):
+    add_to_daily_rollup(
+        company_id=quiz_result.company_id,
+        quiz_id=quiz_result.quiz_id,
+        user_id=quiz_result.user_id,
+        date=timezone.localdate(quiz_result.timestamp),
+        correct_count=quiz_result.correct_count,
+        total_count=quiz_result.question_count,
+    )
+
+
+def rollup_rows_for_results(quiz_results):
+    # Results scored before the counters existed fall back to their score and attempt
+    return (
+        quiz_results
+        .annotate(
+            date=TruncDate('timestamp'),
+            result_total=Coalesce('question_count', attempt_question_count(), 0),
+        )
+        .annotate(
+            result_correct=Case(
+                When(correct_count__isnull=False, then='correct_count'),
+                When(result_total__gt=0, then=Cast('score', IntegerField())),
+                default=0,
+                output_field=IntegerField(),
+            ),
+        )
+        .values('company_id', 'quiz_id', 'user_id', 'date')
+        .annotate(correct_count=Sum('result_correct'), total_count=Sum('result_total'))
+        .order_by()
+    )
+
+
+def rebuild_daily_rollup_for_users(user_ids):
+    # Rollup rows never span users, so a chunk of users can be replaced wholesale
+    rows = rollup_rows_for_results(QuizResult.objects.filter(user_id__in=user_ids))
+    rollups = [
+        DailyScoreRollup(
+            company_id=row['company_id'],
+            quiz_id=row['quiz_id'],
+            user_id=row['user_id'],
+            date=row['date'],
+            correct_count=int(row['correct_count'] or 0),
+            total_count=int(row['total_count'] or 0),
+        )
+        for row in rows
+    ]
+
+    with transaction.atomic():
+        DailyScoreRollup.objects.filter(user_id__in=user_ids).delete()
+        DailyScoreRollup.objects.bulk_create(rollups, batch_size=1000)
+
+    return len(rollups)
@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache import LRUCache, get_quiz_version
+from .models import Question, QuizAttempt, QuizResult, UserAnswer
+from .rollup import record_quiz_result
+from .utils import get_current_quiz_attempt
+
+ANSWER_KEY_TTL = 24 * 3600
+
+_local_answer_keys = LRUCache(settings.QUIZ_ANSWER_KEY_LRU_SIZE)
+
+
+class SubmissionError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def load_answer_key(quiz_id):
+    # {question_id: {answer_id: is_correct}} for the whole quiz in a single LEFT JOIN
+    answer_key = {}
+    rows = Question.objects.filter(quiz_id=quiz_id).values_list('id', 'answers__id', 'answers__is_correct')
+
+    for question_id, answer_id, is_correct in rows:
+        answers = answer_key.setdefault(question_id, {})
+        if answer_id is not None:
+            answers[answer_id] = is_correct
+
+    return answer_key
+
+
+def get_answer_key(quiz_id):
+    version = get_quiz_version(quiz_id)
+
+    answer_key = _local_answer_keys.get((quiz_id, version))
+    if answer_key is not None:
+        return answer_key
+
+    cache_key = f'quiz_answer_key:{quiz_id}:{version}'
+    answer_key = cache.get(cache_key)
+    if answer_key is None:
+        answer_key = load_answer_key(quiz_id)
+        cache.set(cache_key, answer_key, ANSWER_KEY_TTL)
+
+    _local_answer_keys.set((quiz_id, version), answer_key)
+    return answer_key
+
+
+def validate_submission(answer_key, submitted_answers):
+    errors = []
+    seen_questions = set()
+
+    for submitted in submitted_answers:
+        item_errors = {}
+        answers = answer_key.get(submitted['question'])
+        if answers is None:
+            item_errors['question'] = ['Question does not belong to this quiz.']
+        elif submitted['question'] in seen_questions:
+            item_errors['question'] = ['Question is answered more than once.']
+        elif submitted['chosen_answer'] not in answers:
+            item_errors['chosen_answer'] = ['Answer does not belong to this question.']
+        seen_questions.add(submitted['question'])
+        errors.append(item_errors)
+
+    return errors if any(errors) else []
+
+
+def resolve_quiz_attempts(user, quiz, submitted_answers):
+    attempt_ids = {submitted['quiz_attempt'] for submitted in submitted_answers if 'quiz_attempt' in submitted}
+    valid_ids = set(
+        QuizAttempt.objects.filter(id__in=attempt_ids, user=user, quiz=quiz).values_list('id', flat=True)
+    )
+
+    errors = [
+        {'quiz_attempt': ['Invalid quiz attempt.']}
+        if 'quiz_attempt' in submitted and submitted['quiz_attempt'] not in valid_ids else {}
+        for submitted in submitted_answers
+    ]
+    if any(errors):
+        raise SubmissionError(errors)
+
+    if all('quiz_attempt' in submitted for submitted in submitted_answers):
+        default_attempt_id = None
+    else:
+        default_attempt_id = get_current_quiz_attempt(user, quiz).id
+
+    return [submitted.get('quiz_attempt', default_attempt_id) for submitted in submitted_answers]
+
+
+def score_submission(answer_key, submitted_answers):
+    scored_answers = []
+    for submitted in submitted_answers:
+        question_id, answer_id = submitted['question'], submitted['chosen_answer']
+        scored_answers.append((question_id, answer_id, answer_key[question_id][answer_id]))
+    return scored_answers
+
+
+def submit_quiz_answers(quiz, user, submitted_answers, answer_key=None):
+    if answer_key is None:
+        answer_key = get_answer_key(quiz.id)
+
+    errors = validate_submission(answer_key, submitted_answers)
+    if errors:
+        raise SubmissionError(errors)
+
+    attempt_ids = resolve_quiz_attempts(user, quiz, submitted_answers)
+    scored_answers = score_submission(answer_key, submitted_answers)
+    correct_count = sum(1 for _, _, is_correct in scored_answers if is_correct)
+    question_count = len(scored_answers)
+
+    with transaction.atomic():
+        UserAnswer.objects.bulk_create([
+            UserAnswer(quiz_attempt_id=attempt_id, question_id=question_id, chosen_answer_id=answer_id)
+            for attempt_id, (question_id, answer_id, _) in zip(attempt_ids, scored_answers)
+        ])
+        quiz_result = QuizResult.objects.create(
+            quiz=quiz,
+            user=user,
+            company_id=quiz.company_id,
+            score=correct_count,
+            quiz_attempt_id=attempt_ids[-1],
+            correct_count=correct_count,
+            question_count=question_count,
+            score_ratio=correct_count / question_count,
+        )
+        record_quiz_result(quiz_result)
+
+    return quiz_result, scored_answers
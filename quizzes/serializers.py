@@ -22,6 +22,13 @@ class QuizSerializer(serializers.ModelSerializer):
         model = Quiz
         fields = '__all__'
 
+class QuizSummarySerializer(serializers.ModelSerializer):
+    question_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Quiz
+        fields = ('id', 'title', 'frequency_in_days', 'company', 'question_count')
+
 class QuizAttemptSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizAttempt
@@ -30,7 +37,10 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
 class QuizResultSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizResult
-        fields = ('id', 'user', 'quiz', 'timestamp', 'company', 'score', 'quiz_attempt')
+        fields = (
+            'id', 'user', 'quiz', 'timestamp', 'company', 'score', 'quiz_attempt',
+            'correct_count', 'question_count', 'score_ratio',
+        )
 
 class UserAnswerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -40,4 +50,24 @@ class UserAnswerSerializer(serializers.ModelSerializer):
     quiz_attempt = serializers.PrimaryKeyRelatedField(
         queryset=QuizAttempt.objects.all(),
         required=False  # Set the field as not required
-    )
\ No newline at end of file
+    )
+
+class SubmittedAnswerSerializer(serializers.Serializer):
+    question = serializers.IntegerField()
+    chosen_answer = serializers.IntegerField()
+    quiz_attempt = serializers.IntegerField(required=False)
+
+class AnswerImportSerializer(serializers.Serializer):
+    text = serializers.CharField(max_length=255)
+    is_correct = serializers.BooleanField(default=False)
+
+class QuestionImportSerializer(serializers.Serializer):
+    text = serializers.CharField()
+    answers = AnswerImportSerializer(many=True, default=list)
+
+class QuizImportSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField()
+    frequency_in_days = serializers.IntegerField(min_value=0)
+    company = serializers.IntegerField()
+    questions = QuestionImportSerializer(many=True, default=list)
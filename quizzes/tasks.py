@@ -1,24 +1,60 @@
-from datetime import timedelta
+from itertools import groupby
+
 from celery import shared_task
-from django.utils import timezone
 
-from accounts.models import CustomUser
-from notifications.utils import send_notification_to_user
+from notifications.utils import send_notifications_to_users
+
+from .models import Quiz
+from .reminders import membership_chunk_bounds, overdue_pairs
 
-from .models import QuizResult
+NOTIFICATION_CHUNK_SIZE = 1000
+REMINDER_CHUNK_SIZE = 5000
 
 
 @shared_task
 def check_and_notify_users():
-    users = CustomUser.objects.prefetch_related('companies__quiz_set').all()
+    # Only splits the membership table into id ranges, the overdue lookups run in parallel subtasks
+    for start_after, end in membership_chunk_bounds(REMINDER_CHUNK_SIZE):
+        remind_overdue_members.delay(start_after, end)
 
-    for user in users:
-        for company in user.companies.all():
-            quizzes = company.quiz_set.all()
-            for quiz in quizzes:
-                last_test = QuizResult.objects.filter(user=user, quiz=quiz).order_by('-timestamp').first()
-                if not last_test or timezone.now() - last_test.timestamp > timedelta(hours=24):
-                    send_notification_to_user(user, quiz)
 
+@shared_task
+def remind_overdue_members(start_after, end=None):
+    for (quiz_id, quiz_title), pairs in groupby(
+        overdue_pairs(start_after, end).iterator(), key=lambda pair: (pair['quiz_id'], pair['quiz_title'])
+    ):
+        send_notifications_to_users(
+            [pair['user_id'] for pair in pairs],
+            text=f'An undone quiz "{quiz_title}" is available. Take it now!',
+            message=f'New quiz "{quiz_title}" is available. Take it now!',
+        )
 
 
+@shared_task
+def fan_out_quiz_notifications(quiz_id):
+    quiz = Quiz.objects.select_related('company').filter(id=quiz_id).first()
+    if quiz is None:
+        return
+
+    # Keyset over member ids, each chunk is written and pushed by its own task
+    members = quiz.company.members.order_by('id').values_list('id', flat=True)
+    last_id = 0
+    while True:
+        user_ids = list(members.filter(id__gt=last_id)[:NOTIFICATION_CHUNK_SIZE])
+        if not user_ids:
+            break
+        send_quiz_notifications.delay(quiz_id, user_ids)
+        last_id = user_ids[-1]
+
+
+@shared_task
+def send_quiz_notifications(quiz_id, user_ids):
+    quiz = Quiz.objects.only('title').filter(id=quiz_id).first()
+    if quiz is None:
+        return
+
+    send_notifications_to_users(
+        user_ids,
+        text=f'An undone quiz "{quiz.title}" is available. Take it now!',
+        message=f'New quiz "{quiz.title}" is available. Take it now!',
+    )
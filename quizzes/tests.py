@@ -1,13 +1,29 @@
+import json
 from datetime import datetime, timedelta
-
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from accounts.models import CustomUser
 from companies.models import Company
+from notifications.models import Notification
 
-from .models import Answer, Question, Quiz, QuizResult
-from .utils import get_current_quiz_attempt
+from .analytics import average_score as results_average_score
+from .cache import bump_quiz_version, get_quiz_version, quiz_version_key
+from .models import Answer, DailyScoreRollup, Question, Quiz, QuizResult, UserAnswer
+from .reminders import membership_chunk_bounds, overdue_pairs
+from .scoring import get_answer_key
+from .tasks import remind_overdue_members, send_quiz_notifications
+from .utils import get_current_quiz_attempt, get_user_answers_from_redis, user_answers_key
 
 
 class QuizAPITestCase(APITestCase):
@@ -265,6 +281,40 @@ class QuizAPITestCase(APITestCase):
         self.assertEqual(response.data["average_score"], 0.5)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_company_average_score_for_several_members(self):
+        member = CustomUser.objects.create(username="member", password="password")
+        outsider = CustomUser.objects.create(username="outsider", password="password")
+        self.company.members.add(member)
+        other_company = Company.objects.create(name='Other', owner=outsider)
+        other_quiz = Quiz.objects.create(title='Other', company=other_company, frequency_in_days=1)
+
+        QuizResult.objects.create(
+            user=self.user, quiz=self.quiz, company=self.company, score=50.0, correct_count=1, question_count=2
+        )
+        QuizResult.objects.create(
+            user=self.user, quiz=other_quiz, company=other_company, score=0.0, correct_count=0, question_count=4
+        )
+
+        url = f'/company/{self.company.id}/average_score/?user_ids={self.user.id},{member.id},{outsider.id}'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['average_scores'], [
+            {'user_id': self.user.id, 'average_score': 0.5},
+            {'user_id': member.id, 'average_score': 0},
+        ])
+        result_queries = [q['sql'] for q in queries.captured_queries if 'quizzes_quizresult' in q['sql']]
+        self.assertEqual(len(result_queries), 1)
+        results_join = result_queries[0].split('quizzes_quizresult', 1)[1].split('WHERE', 1)[0]
+        self.assertIn(f'"company_id" = {self.company.id}', results_join)
+
+        response = self.client.get(f'/company/{self.company.id}/average_score/?user_id={outsider.id}')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(f'/company/{self.company.id}/average_score/?user_ids=1,x')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_user_score_overall(self):
         QuizResult.objects.create(
             quiz=self.quiz, 
@@ -345,6 +395,57 @@ class QuizAPITestCase(APITestCase):
         self.assertEqual(response.data, expected_data)
         self.assertEqual(response.data, expected_data)
 
+    def test_quiz_activity_summary(self):
+        other = CustomUser.objects.create(username="other", password="password")
+        QuizResult.objects.create(
+            user=self.user, quiz=self.quiz, company=self.company, score=50.0, correct_count=1, question_count=2
+        )
+        latest = QuizResult.objects.create(
+            user=other, quiz=self.quiz, company=self.company, score=100.0, correct_count=2, question_count=2
+        )
+
+        response = self.client.get(f'/company/{self.company.id}/quiz-activity/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {
+                'quiz_id': self.quiz.id,
+                'quiz_title': self.quiz.title,
+                'last_completion_time': latest.timestamp,
+                'completions': 2,
+                'distinct_takers': 2,
+                'average_score': 0.75,
+            },
+            {
+                'quiz_id': self.quiz2.id,
+                'quiz_title': self.quiz2.title,
+                'last_completion_time': None,
+                'completions': 0,
+                'distinct_takers': 0,
+                'average_score': 0,
+            },
+        ])
+
+    def test_quiz_activity_is_cached_until_submission(self):
+        url = f'/company/{self.company.id}/quiz-activity/'
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([q for q in queries.captured_queries if 'quizzes_quiz' in q['sql']])
+
+        QuizResult.objects.create(
+            user=self.user, quiz=self.quiz2, company=self.company, score=100.0, correct_count=1, question_count=1
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.data[1]['completions'], 1)
+        self.assertEqual(response.data[1]['average_score'], 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.quiz2.delete()
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('SELECT "quizzes_quizresult"')])
+        self.assertEqual(len(self.client.get(url).data), 1)
+
     def test_get_dynamics_all_average_scores_for_quiz(self):
         question1 = Question.objects.create(quiz=self.quiz, text="Question 1")
         question2 = Question.objects.create(quiz=self.quiz, text="Question 2")
@@ -417,7 +518,7 @@ class QuizAPITestCase(APITestCase):
 
         url = '/users/all-average-scores-over-time/'
         response = self.client.get(url)
-        data = response.data
+        data = response.data['results']
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(data[0]['results_data'][0]['average_score'], 0.5)
@@ -492,11 +593,493 @@ class QuizAPITestCase(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(isinstance(response.data, list))
-        self.assertTrue('user_id' in response.data[0])
-        self.assertTrue('username' in response.data[0])
-        self.assertTrue('last_test_time' in response.data[0])
+        self.assertTrue(isinstance(response.data['results'], list))
+        self.assertTrue('user_id' in response.data['results'][0])
+        self.assertTrue('username' in response.data['results'][0])
+        self.assertTrue('last_test_time' in response.data['results'][0])
+
+    def test_users_last_test_time_filters_inactive_members_in_one_query(self):
+        members = CustomUser.objects.bulk_create([CustomUser(username=f"member{i}") for i in range(3)])
+        self.company.members.add(*members)
+        recent = QuizResult.objects.create(user=members[0], quiz=self.quiz, company=self.company, score=1)
+        stale = QuizResult.objects.create(user=members[1], quiz=self.quiz, company=self.company, score=1)
+        QuizResult.objects.filter(id=stale.id).update(timestamp=timezone.now() - timedelta(days=30))
+
+        url = f'/company/{self.company.id}/users-last-test-time/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'inactive_days': 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {entry['username'] for entry in response.data['results']},
+            {self.user.username, 'member1', 'member2'},
+        )
+        self.assertEqual(len([query for query in queries if 'quizzes_quizresult' in query['sql']]), 1)
+
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        last_times = {entry['user_id']: entry['last_test_time'] for entry in response.data['results']}
+        response = self.client.get(response.data['next'])
+        last_times.update({entry['user_id']: entry['last_test_time'] for entry in response.data['results']})
+        self.assertEqual(last_times[members[0].id], recent.timestamp)
+        self.assertIsNone(last_times[members[2].id])
+
+        response = self.client.get(url, {'inactive_days': 'week'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def _create_questions(self, count):
+        submitted = []
+        attempt = get_current_quiz_attempt(self.user, self.quiz)
+        for i in range(count):
+            question = Question.objects.create(quiz=self.quiz, text=f"Question {i}")
+            correct = Answer.objects.create(question=question, text="Correct", is_correct=True)
+            Answer.objects.create(question=question, text="Incorrect", is_correct=False)
+            submitted.append({"question": question.id, "chosen_answer": correct.id, "quiz_attempt": attempt.id})
+        return submitted
+
+    def test_submit_answers_query_count_is_flat(self):
+        url = f'/quizzes/{self.quiz.id}/submit_answers/'
+        submitted = self._create_questions(20)
+        # Warm up the answer key cache and today's rollup row
+        self.client.post(url, submitted[:1], format='json')
 
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.post(url, submitted[:2], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
-        
-        
\ No newline at end of file
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(url, submitted, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(QuizResult.objects.filter(quiz=self.quiz).order_by('-id').first().score, 20)
+        self.assertEqual(UserAnswer.objects.filter(question__quiz=self.quiz).count(), 23)
+
+    def test_submit_answers_rejects_answer_from_other_question(self):
+        submitted = self._create_questions(2)
+        submitted[0]['chosen_answer'] = submitted[1]['chosen_answer']
+
+        url = f'/quizzes/{self.quiz.id}/submit_answers/'
+        response = self.client.post(url, submitted, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('chosen_answer', response.data[0])
+        self.assertFalse(QuizResult.objects.filter(quiz=self.quiz).exists())
+        self.assertFalse(UserAnswer.objects.exists())
+
+    def test_submit_answers_rejects_repeated_question(self):
+        submitted = self._create_questions(3)
+
+        url = f'/quizzes/{self.quiz.id}/submit_answers/'
+        response = self.client.post(url, [submitted[0]] * 5, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('question', response.data[1])
+        self.assertFalse(QuizResult.objects.filter(quiz=self.quiz).exists())
+        self.assertFalse(UserAnswer.objects.exists())
+
+    def test_answer_key_is_served_from_cache(self):
+        submitted = self._create_questions(3)
+        get_answer_key(self.quiz.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            answer_key = get_answer_key(self.quiz.id)
+
+        self.assertEqual(len(queries), 0)
+        self.assertTrue(answer_key[submitted[0]['question']][submitted[0]['chosen_answer']])
+
+    def test_answer_key_is_invalidated_on_answer_change(self):
+        submitted = self._create_questions(1)
+        question_id, answer_id = submitted[0]['question'], submitted[0]['chosen_answer']
+        self.assertTrue(get_answer_key(self.quiz.id)[question_id][answer_id])
+
+        answer = Answer.objects.get(id=answer_id)
+        answer.is_correct = False
+        answer.save()
+
+        self.assertFalse(get_answer_key(self.quiz.id)[question_id][answer_id])
+
+    def test_quiz_version_is_bumped_again_on_commit(self):
+        before = get_quiz_version(self.quiz.id)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            bump_quiz_version(self.quiz.id)
+            bumped = get_quiz_version(self.quiz.id)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(before, bumped)
+        self.assertNotEqual(bumped, get_quiz_version(self.quiz.id))
+
+    def test_quiz_delete_query_count_is_flat(self):
+        def delete_quiz_with(question_count):
+            quiz = Quiz.objects.create(title='Delete me', company=self.company, frequency_in_days=1)
+            for i in range(question_count):
+                question = Question.objects.create(quiz=quiz, text=f"Question {i}")
+                Answer.objects.bulk_create([Answer(question=question, text=str(j)) for j in range(4)])
+            with CaptureQueriesContext(connection) as queries:
+                quiz.delete()
+            return len(queries)
+
+        self.assertEqual(delete_quiz_with(2), delete_quiz_with(20))
+
+    def test_quiz_version_is_bumped_on_question_and_answer_delete(self):
+        submitted = self._create_questions(2)
+        version = get_quiz_version(self.quiz.id)
+        Answer.objects.filter(question_id=submitted[0]['question'], is_correct=False).delete()
+        self.assertNotEqual(get_quiz_version(self.quiz.id), version)
+
+        version = get_quiz_version(self.quiz.id)
+        Question.objects.get(id=submitted[1]['question']).delete()
+        self.assertNotEqual(get_quiz_version(self.quiz.id), version)
+
+    def test_submitted_answers_are_written_to_redis_in_batch(self):
+        submitted = self._create_questions(3)
+        url = f'/quizzes/{self.quiz.id}/submit_answers/'
+        response = self.client.post(url, submitted, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        question_ids = [item['question'] for item in submitted]
+        stored = get_user_answers_from_redis(self.user.id, self.quiz.id, question_ids)
+
+        self.assertEqual(set(stored), set(question_ids))
+        self.assertTrue(all(answer['is_correct'] for answer in stored.values()))
+        self.assertEqual(stored[question_ids[0]]['answer'], submitted[0]['chosen_answer'])
+
+    def test_legacy_redis_answers_are_migrated_to_hashes(self):
+        submitted = self._create_questions(2)
+        stale_keys = list(settings.REDIS_CONNECTION.scan_iter(match=f'user_answer:{self.user.id}:{self.quiz.id}:*'))
+        if stale_keys:
+            settings.REDIS_CONNECTION.delete(*stale_keys)
+        legacy_keys = []
+        for item in submitted:
+            key = f'user_answer:{self.user.id}:{self.quiz.id}:{item["question"]}'
+            settings.REDIS_CONNECTION.setex(key, 3600, json.dumps({
+                'user_id': self.user.id,
+                'quiz_id': self.quiz.id,
+                'question_id': item['question'],
+                'answer': item['chosen_answer'],
+                'is_correct': True,
+                'company_id': self.company.id,
+            }))
+            legacy_keys.append(key)
+        settings.REDIS_CONNECTION.delete(user_answers_key(self.user.id, self.quiz.id))
+
+        call_command('migrate_user_answers_to_hashes', stdout=StringIO())
+
+        self.assertEqual(settings.REDIS_CONNECTION.exists(*legacy_keys), 0)
+        stored = get_user_answers_from_redis(self.user.id, self.quiz.id)
+        self.assertEqual(set(stored), {item['question'] for item in submitted})
+        self.assertEqual(stored[submitted[0]['question']]['company_id'], self.company.id)
+        self.assertTrue(0 < settings.REDIS_CONNECTION.ttl(user_answers_key(self.user.id, self.quiz.id)) <= 3600)
+
+    def _submit_half_correct(self):
+        question1 = Question.objects.create(quiz=self.quiz, text="Question 1")
+        question2 = Question.objects.create(quiz=self.quiz, text="Question 2")
+        correct = Answer.objects.create(question=question1, text="Correct", is_correct=True)
+        incorrect = Answer.objects.create(question=question2, text="Incorrect", is_correct=False)
+
+        url = f'/quizzes/{self.quiz.id}/submit_answers/'
+        data = [
+            {"question": question1.id, "chosen_answer": correct.id},
+            {"question": question2.id, "chosen_answer": incorrect.id},
+        ]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_average_scores_over_time_buckets_and_range(self):
+        self._submit_half_correct()
+        self._submit_half_correct()
+        today = datetime.now().date()
+
+        url = f'/quizzes/{self.quiz.id}/average-scores-over-time/'
+        response = self.client.get(url, {'bucket': 'month', 'from': today.isoformat(), 'to': today.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['date'], today.replace(day=1))
+        self.assertEqual(response.data[0]['average_score'], 0.5)
+
+        response = self.client.get(url, {'from': (today + timedelta(days=1)).isoformat()})
+        self.assertEqual(response.data, [])
+
+    def test_average_scores_over_time_rejects_bad_params(self):
+        url = f'/quizzes/{self.quiz.id}/average-scores-over-time/'
+        self.assertEqual(self.client.get(url, {'bucket': 'year'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'from': 'yesterday'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_all_average_scores_over_time_by_company(self):
+        other_user = CustomUser.objects.create(username="outsider", password="password")
+        self._submit_half_correct()
+
+        url = '/users/all-average-scores-over-time/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'company': self.company.id})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(response.data['results'][0]['user'], self.user.username)
+        self.assertEqual(response.data['results'][0]['results_data'][0]['average_score'], 0.5)
+        self.assertLessEqual(len(queries), 3)
+
+        response = self.client.get(url, {'page_size': 1})
+        usernames = [entry['user'] for entry in response.data['results']]
+        self.assertEqual(len(usernames), 1)
+        self.assertIsNotNone(response.data['next'])
+        self.assertNotIn(other_user.username, usernames)
+
+    def test_score_rollup_is_maintained_and_rebuilt(self):
+        submitted = self._create_questions(2)
+        submitted[1]['chosen_answer'] = Answer.objects.get(question=submitted[1]['question'], is_correct=False).id
+        url = f'/quizzes/{self.quiz.id}/submit_answers/'
+        self.client.post(url, submitted, format='json')
+        self.client.post(url, submitted, format='json')
+
+        rollup = DailyScoreRollup.objects.get(quiz=self.quiz, user=self.user)
+        self.assertEqual((rollup.correct_count, rollup.total_count), (2, 4))
+
+        DailyScoreRollup.objects.all().delete()
+        call_command('rebuild_score_rollup', chunk_size=1, stdout=StringIO())
+
+        rollup = DailyScoreRollup.objects.get(quiz=self.quiz, user=self.user)
+        self.assertEqual(rollup.company_id, self.company.id)
+        self.assertEqual((rollup.correct_count, rollup.total_count), (2, 4))
+
+    def test_submission_stores_result_counters(self):
+        self._submit_half_correct()
+
+        quiz_result = QuizResult.objects.get(quiz=self.quiz, user=self.user)
+        self.assertEqual((quiz_result.correct_count, quiz_result.question_count), (1, 2))
+        self.assertEqual(quiz_result.score_ratio, 0.5)
+
+    def test_backfill_quiz_result_counters(self):
+        submitted = self._create_questions(2)
+        attempt = get_current_quiz_attempt(self.user, self.quiz)
+        UserAnswer.objects.bulk_create([
+            UserAnswer(quiz_attempt=attempt, question_id=item['question'], chosen_answer_id=item['chosen_answer'])
+            for item in submitted
+        ])
+        legacy = QuizResult.objects.create(quiz=self.quiz, user=self.user, score=1, quiz_attempt=attempt)
+        without_attempt = QuizResult.objects.create(quiz=self.quiz, user=self.user, score=3)
+
+        call_command('backfill_quiz_result_counters', chunk_size=1, stdout=StringIO())
+
+        legacy.refresh_from_db()
+        without_attempt.refresh_from_db()
+        self.assertEqual((legacy.correct_count, legacy.question_count, legacy.score_ratio), (1, 2, 0.5))
+        self.assertEqual(
+            (without_attempt.correct_count, without_attempt.question_count, without_attempt.score_ratio), (0, 0, 0.0)
+        )
+        self.assertEqual(results_average_score(QuizResult.objects.filter(user=self.user)), 0.5)
+
+    def test_rollup_rebuild_ignores_score_without_total(self):
+        QuizResult.objects.create(quiz=self.quiz, user=self.user, company=self.company, score=3)
+        QuizResult.objects.create(
+            quiz=self.quiz, user=self.user, company=self.company, score=1, correct_count=1, question_count=4
+        )
+
+        call_command('rebuild_score_rollup', chunk_size=1, stdout=StringIO())
+
+        rollup = DailyScoreRollup.objects.get(quiz=self.quiz, user=self.user)
+        self.assertEqual((rollup.correct_count, rollup.total_count), (1, 4))
+
+    def test_create_quiz_with_questions_in_bulk(self):
+        data = {
+            "title": "Bulk Quiz",
+            "description": "Many questions",
+            "frequency_in_days": 7,
+            "company": self.company.id,
+            "questions": [
+                {"text": f"Question {i}", "answers": [
+                    {"text": "Correct", "is_correct": True},
+                    {"text": "Incorrect", "is_correct": False},
+                ]}
+                for i in range(30)
+            ],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/quizzes/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "quizzes_')]
+        self.assertEqual(len(inserts), 3)
+        quiz = Quiz.objects.get(title="Bulk Quiz")
+        self.assertEqual(quiz.questions.count(), 30)
+        self.assertEqual(Answer.objects.filter(question__quiz=quiz, is_correct=True).count(), 30)
+
+    def test_import_quizzes_from_csv(self):
+        rows = [
+            "quiz_title,quiz_description,frequency_in_days,company,question,answer,is_correct",
+            f"Imported 1,Desc,3,{self.company.id},Q1,A,true",
+            f"Imported 1,Desc,3,{self.company.id},Q1,B,false",
+            f"Imported 1,Desc,3,{self.company.id},Q2,C,true",
+            f"Imported 2,Desc,5,{self.company.id},Q1,D,true",
+        ]
+        upload = SimpleUploadedFile('quizzes.csv', '\n'.join(rows).encode(), content_type='text/csv')
+
+        response = self.client.post('/quizzes/import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'quizzes_created': 2, 'questions_created': 3, 'answers_created': 4})
+        imported = Quiz.objects.get(title="Imported 1")
+        self.assertEqual(imported.questions.count(), 2)
+        question = imported.questions.get(text="Q1")
+        self.assertEqual(sorted(get_answer_key(imported.id)[question.id].values()), [False, True])
+
+    def test_import_quizzes_rejects_non_utf8_csv(self):
+        rows = [
+            "quiz_title,quiz_description,frequency_in_days,company,question,answer,is_correct",
+            f"Caf\u00e9,Desc,3,{self.company.id},Q1,A,true",
+        ]
+        upload = SimpleUploadedFile('quizzes.csv', '\n'.join(rows).encode('latin-1'), content_type='text/csv')
+
+        response = self.client.post('/quizzes/import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('file', response.data)
+
+    def test_import_quizzes_from_json_lines(self):
+        lines = [
+            json.dumps({"title": f"Line {i}", "description": "d", "frequency_in_days": 1, "company": self.company.id,
+                        "questions": [{"text": "Q", "answers": [{"text": "A", "is_correct": True}]}]})
+            for i in range(3)
+        ]
+        upload = SimpleUploadedFile('quizzes.jsonl', '\n'.join(lines).encode(), content_type='application/x-ndjson')
+
+        response = self.client.post('/quizzes/import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'quizzes_created': 3, 'questions_created': 3, 'answers_created': 3})
+
+    def test_import_quizzes_from_json_is_atomic(self):
+        other_owner = CustomUser.objects.create(username="other", password="password")
+        other_company = Company.objects.create(name='Other', description='Other', owner=other_owner)
+        quizzes = [
+            {"title": "Mine", "description": "d", "frequency_in_days": 1, "company": self.company.id,
+             "questions": [{"text": "Q", "answers": [{"text": "A", "is_correct": True}]}]},
+            {"title": "Theirs", "description": "d", "frequency_in_days": 1, "company": other_company.id},
+        ]
+        upload = SimpleUploadedFile('quizzes.json', json.dumps(quizzes).encode(), content_type='application/json')
+
+        response = self.client.post('/quizzes/import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Quiz.objects.filter(title__in=["Mine", "Theirs"]).exists())
+
+    def test_quiz_notifications_are_fanned_out_after_commit_on_create_only(self):
+        with mock.patch('quizzes.tasks.fan_out_quiz_notifications.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                quiz = Quiz.objects.create(
+                    title='Fan out', description='d', company=self.company, frequency_in_days=1,
+                )
+            delay.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+            delay.assert_called_once_with(quiz.id)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                quiz.title = 'Fan out again'
+                quiz.save()
+            delay.assert_called_once_with(quiz.id)
+
+    def test_send_quiz_notifications_bulk_creates_rows(self):
+        members = CustomUser.objects.bulk_create([CustomUser(username=f"member{i}") for i in range(25)])
+        user_ids = [member.id for member in members]
+
+        with CaptureQueriesContext(connection) as queries:
+            send_quiz_notifications(self.quiz.id, user_ids)
+
+        self.assertEqual(Notification.objects.filter(user_id__in=user_ids).count(), 25)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('INSERT')]), 1)
+
+    def test_overdue_reminders_follow_quiz_frequency(self):
+        member = CustomUser.objects.create(username="member")
+        self.company.members.add(member)
+        weekly_quiz = Quiz.objects.create(
+            title='Weekly Quiz', description='d', company=self.company, frequency_in_days=7,
+        )
+
+        three_days_ago = timezone.now() - timedelta(days=3)
+        QuizResult.objects.create(user=self.user, quiz=self.quiz, company=self.company, score=1)
+        for quiz in (self.quiz, weekly_quiz):
+            result = QuizResult.objects.create(user=member, quiz=quiz, company=self.company, score=1)
+            QuizResult.objects.filter(id=result.id).update(timestamp=three_days_ago)
+
+        pairs = {(pair['user_id'], pair['quiz_id']) for pair in overdue_pairs()}
+        self.assertEqual(pairs, {
+            (self.user.id, self.quiz2.id),
+            (self.user.id, weekly_quiz.id),
+            (member.id, self.quiz.id),
+            (member.id, self.quiz2.id),
+        })
+
+        with CaptureQueriesContext(connection) as queries:
+            remind_overdue_members(0)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Notification.objects.filter(user=member).count(), 2)
+        self.assertEqual(len(queries), 4)
+
+    def test_membership_chunk_bounds_cover_every_membership(self):
+        members = CustomUser.objects.bulk_create([CustomUser(username=f"member{i}") for i in range(4)])
+        self.company.members.add(*members)
+
+        bounds = list(membership_chunk_bounds(2))
+        self.assertEqual(len(bounds), 3)
+        self.assertIsNone(bounds[-1][1])
+
+        covered = sum(len(overdue_pairs(start_after, end)) for start_after, end in bounds)
+        self.assertEqual(covered, len(overdue_pairs()))
+
+    def test_quiz_listings_return_summaries_in_one_query(self):
+        self._create_questions(3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/company/{self.company.id}/list-quizzes/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len([query for query in queries if 'quizzes_quiz' in query['sql']]), 1)
+        self.assertEqual(
+            [(quiz['title'], quiz['question_count']) for quiz in response.data],
+            [('Test Quiz', 3), ('Test Quiz 2', 0)],
+        )
+        self.assertNotIn('questions', response.data[0])
+
+        response = self.client.get('/quizzes/')
+        self.assertEqual([quiz['question_count'] for quiz in response.data['results']], [3, 0])
+
+    def test_quiz_retrieve_serves_cached_bytes_and_etags(self):
+        self._create_questions(2)
+        url = f'/quizzes/{self.quiz.id}/'
+        etag = self.client.get(url)['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(len(json.loads(response.content)['questions']), 2)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=f'"other", W/{etag}').status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, status.HTTP_304_NOT_MODIFIED)
+
+        question = Question.objects.create(quiz=self.quiz, text="Added")
+        Answer.objects.create(question=question, text="Answer", is_correct=True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(json.loads(response.content)['questions']), 3)
+
+        self.assertEqual(self.client.get('/quizzes/0/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_quiz_version_tokens_expire_and_are_not_created_for_missing_quizzes(self):
+        missing_id = Quiz.objects.order_by('-id').values_list('id', flat=True).first() + 1000
+        self.assertEqual(self.client.get(f'/quizzes/{missing_id}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNone(cache.get(quiz_version_key(missing_id)))
+
+        self.client.get(f'/quizzes/{self.quiz.id}/')
+        self.assertIsNotNone(cache.ttl(quiz_version_key(self.quiz.id)))
+
+        quiz_id = self.quiz.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quiz.delete()
+        self.assertIsNone(cache.get(quiz_version_key(quiz_id)))
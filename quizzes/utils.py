@@ -1,8 +1,7 @@
-import json
-
 from django.conf import settings
+from django.db.models import Count, IntegerField, OuterRef, Subquery
 
-from .models import QuizAttempt
+from .models import QuizAttempt, UserAnswer
 
 
 def get_current_quiz_attempt(user, quiz):
@@ -14,29 +13,81 @@ def get_current_quiz_attempt(user, quiz):
             new_attempt.save()
             return new_attempt
 
-def save_user_answer_to_redis(user_id, quiz_id, question_id, answer, is_correct, company_id):
-    key = f'user_answer:{user_id}:{quiz_id}:{question_id}'
+def attempt_question_count():
+    # Attempts are reused across submissions, so the size of one submission is the number of
+    # distinct questions answered in its attempt. Meant to be evaluated against a QuizResult row.
+    return Subquery(
+        UserAnswer.objects
+        .filter(quiz_attempt=OuterRef('quiz_attempt'))
+        .values('quiz_attempt')
+        .annotate(count=Count('question', distinct=True))
+        .values('count'),
+        output_field=IntegerField(),
+    )
+
+USER_ANSWER_TTL = 48 * 3600
+COMPANY_FIELD = 'c'
+
+
+def user_answers_key(user_id, quiz_id):
+    return f'user_answers:{user_id}:{quiz_id}'
+
+def pack_answer(answer, is_correct):
+    # The lowest bit carries correctness, the rest is the answer id
+    return (int(answer) << 1) | int(bool(is_correct))
+
+def unpack_answer(packed):
+    packed = int(packed)
+    return packed >> 1, bool(packed & 1)
 
-    user_answer_data = {
+def save_user_answers_to_redis(user_id, quiz_id, company_id, answers):
+    # One hash per (user, quiz): question id -> packed answer, plus the company id under COMPANY_FIELD
+    mapping = {question_id: pack_answer(answer, is_correct) for question_id, answer, is_correct in answers}
+    if not mapping:
+        return
+    mapping[COMPANY_FIELD] = company_id
+
+    key = user_answers_key(user_id, quiz_id)
+    pipeline = settings.REDIS_CONNECTION.pipeline()
+    pipeline.hset(key, mapping=mapping)
+    pipeline.expire(key, USER_ANSWER_TTL)
+    pipeline.execute()
+
+def _user_answer_data(user_id, quiz_id, question_id, packed, company_id):
+    answer, is_correct = unpack_answer(packed)
+    return {
         'user_id': user_id,
         'quiz_id': quiz_id,
         'question_id': question_id,
         'answer': answer,
         'is_correct': is_correct,
-        'company_id': company_id
+        'company_id': int(company_id) if company_id is not None else None
     }
 
-    user_answer_json = json.dumps(user_answer_data)
+def get_user_answers_from_redis(user_id, quiz_id, question_ids=None):
+    key = user_answers_key(user_id, quiz_id)
+
+    if question_ids is None:
+        stored = settings.REDIS_CONNECTION.hgetall(key)
+        company_id = stored.pop(COMPANY_FIELD, None)
+        return {
+            int(question_id): _user_answer_data(user_id, quiz_id, int(question_id), packed, company_id)
+            for question_id, packed in stored.items()
+        }
+
+    question_ids = list(question_ids)
+    if not question_ids:
+        return {}
 
-    ttl = 48 * 3600 
-    settings.REDIS_CONNECTION.setex(key, ttl, user_answer_json)
+    company_id, *values = settings.REDIS_CONNECTION.hmget(key, [COMPANY_FIELD, *question_ids])
+    return {
+        question_id: _user_answer_data(user_id, quiz_id, question_id, packed, company_id)
+        for question_id, packed in zip(question_ids, values)
+        if packed is not None
+    }
+
+def save_user_answer_to_redis(user_id, quiz_id, question_id, answer, is_correct, company_id):
+    save_user_answers_to_redis(user_id, quiz_id, company_id, [(question_id, answer, is_correct)])
 
 def get_user_answer_from_redis(user_id, quiz_id, question_id):
-    key = f'user_answer:{user_id}:{quiz_id}:{question_id}'
-    user_answer_json = settings.REDIS_CONNECTION.get(key)
-
-    if user_answer_json:
-        user_answer_data = json.loads(user_answer_json)
-        return user_answer_data
-    else:
-        return None
\ No newline at end of file
+    return get_user_answers_from_redis(user_id, quiz_id, [question_id]).get(question_id)
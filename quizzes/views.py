@@ -1,64 +1,71 @@
 import csv
 import json
 
-from django.db.models import Case, Count, FloatField, Prefetch, Sum, Value, When
-from django.db.models.functions import TruncDate
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.http import HttpResponse, HttpResponseNotModified
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from accounts.models import CustomUser
+from core.pagination import KeysetPagination
 
-from .models import Answer, Question, Quiz, QuizResult
+from .analytics import parse_time_series_params, score_time_series
+from .authoring import bulk_create_questions, import_quizzes
+from .models import DailyScoreRollup, Quiz, QuizResult
+from .payloads import etag_matches, get_existing_quiz_version, get_quiz_detail, quiz_etag
+from .scoring import SubmissionError, submit_quiz_answers
 from .serializers import (
     AnswerSerializer,
+    QuestionImportSerializer,
     QuestionSerializer,
     QuizAttemptSerializer,
     QuizResultSerializer,
     QuizSerializer,
-    UserAnswerSerializer,
+    QuizSummarySerializer,
+    SubmittedAnswerSerializer,
 )
-from .utils import save_user_answer_to_redis
-
-
-class QuizPagination(PageNumberPagination):
-    page_size = 1
+from .utils import save_user_answers_to_redis
 
 
 class QuizViewSet(ModelViewSet):
     queryset = Quiz.objects.prefetch_related('questions__answers').all()
     serializer_class = QuizSerializer
     #permission_classes = [IsCompanyOwnerOrAdministrator]        
-    pagination_class = QuizPagination
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        # Scoring loads its own answer key, the nested prefetch would only be thrown away
+        if self.action == 'submit_answers':
+            return Quiz.objects.all()
+        if self.action == 'list':
+            return Quiz.objects.annotate(question_count=Count('questions'))
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return QuizSummarySerializer
+        return self.serializer_class
 
     def perform_create(self, serializer):
-        if serializer.is_valid:
+        questions = QuestionImportSerializer(data=self.request.data.get('questions', []), many=True)
+        questions.is_valid(raise_exception=True)
+
+        with transaction.atomic():
             quiz = serializer.save()
-            
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            bulk_create_questions([(quiz, questions.validated_data)])
 
-        questions_data = self.request.data.get('questions', [])
-        questions = []
-
-        for question_data in questions_data:
-            question = Question(quiz=quiz, text=question_data['text'])
-            question.save()
-            questions.append(question)
-
-            answers_data = question_data.get('answers', [])
-            answers = [Answer(
-                question=question, 
-                text=answer_data['text'], 
-                is_correct=answer_data['is_correct']) 
-                for answer_data in answers_data]
-            Answer.objects.bulk_create(answers)
-        
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_quizzes(self, request):
+        uploaded_file = request.FILES.get('file')
+        if uploaded_file is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
 
+        totals = import_quizzes(uploaded_file, request.user)
+        return Response(totals, status=status.HTTP_201_CREATED)
 
     def update(self, request, pk=None):
         quiz = self.get_object()
@@ -78,16 +85,32 @@ class QuizViewSet(ModelViewSet):
         page = self.paginate_queryset(queryset)  
 
         if page is not None:
-            serializer = QuizSerializer(page, many=True)
+            serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = QuizSerializer(queryset, many=True)
+        serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
         
     def retrieve(self, request, pk=None):
-        quiz = self.get_object()
-        serializer = QuizSerializer(quiz)
-        return Response(serializer.data)
+        if not str(pk).isdigit():
+            return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Served from the version token and cached bytes, the ORM is only hit after a change
+        version = get_existing_quiz_version(int(pk))
+        if version is None:
+            return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
+        etag = quiz_etag(pk, version)
+        if etag_matches(etag, request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            payload = get_quiz_detail(int(pk), version)
+            if payload is None:
+                return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
+            response = HttpResponse(payload, content_type='application/json')
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
         
     @action(detail=True, methods=['post'])
     def create_question(self, request, pk=None):
@@ -124,44 +147,22 @@ class QuizViewSet(ModelViewSet):
     def submit_answers(self, request, pk=None):
         quiz = self.get_object()
 
-        serializer = UserAnswerSerializer(data=request.data, many=True)
-        if serializer.is_valid():
-            user_answers = serializer.save()
-            total_score = 0
-
-            for user_answer in user_answers:
-                question = user_answer.question
-                chosen_answer = user_answer.chosen_answer
-                correct_answers = question.answers.filter(is_correct=True).prefetch_related(None)
-                if correct_answers.filter(id=chosen_answer.id).exists():
-                    total_score += 1
-
-                    save_user_answer_to_redis(
-                        user_id=request.user.id,
-                        quiz_id=quiz.id,
-                        question_id=question.id,
-                        answer=chosen_answer.id,
-                        is_correct=True,  
-                        company_id= quiz.company.id,
-                    )
-                else:
-                    save_user_answer_to_redis(
-                        user_id=request.user.id,
-                        quiz_id=quiz.id,
-                        question_id=question.id,
-                        answer=chosen_answer.id,
-                        is_correct=False,  
-                        company_id= quiz.company.id,
-                    )
-            quiz_result = QuizResult(
-                quiz=quiz, 
-                user=request.user, 
-                score=total_score, 
-                quiz_attempt=user_answer.quiz_attempt
-                )
-            quiz_result.save()
-            return Response({'message': 'Answers submitted successfully'}, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer = SubmittedAnswerSerializer(data=request.data, many=True, allow_empty=False)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            quiz_result, scored_answers = submit_quiz_answers(quiz, request.user, serializer.validated_data)
+        except SubmissionError as e:
+            return Response(e.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        save_user_answers_to_redis(
+            user_id=request.user.id,
+            quiz_id=quiz.id,
+            company_id=quiz.company_id,
+            answers=scored_answers,
+        )
+        return Response({'message': 'Answers submitted successfully'}, status=status.HTTP_201_CREATED)
 
 
     @action(detail=True, methods=['get'], url_path='user-score')
@@ -245,49 +246,12 @@ class QuizViewSet(ModelViewSet):
     @action(detail=True, methods=['get'], url_path='average-scores-over-time')
     def get_average_scores_over_time(self, request, pk=None):
         quiz = self.get_object()
-        user = request.user
-
-        quiz_results = (
-            QuizResult.objects
-            .filter(quiz=quiz, user=user)
-            .annotate(
-                date=TruncDate('timestamp')
-            )
-            .values('date')
-            .annotate(
-                total_correct_answers=Sum(
-                    Case(
-                        When(
-                            quiz_attempt__useranswer__chosen_answer__in=Answer.objects.filter(is_correct=True),
-                            then=Value(1.0),
-                        ),
-                        default=Value(0.0),
-                        output_field=FloatField()
-                    )
-                    ),
-                total_answers=Count(
-                    'quiz_attempt__useranswer'
-                ),
-            )
-            .order_by('date')
-        )
-        results_data = []
-        cumulative_total_correct = 0
-        cumulative_total_answers = 0
-
-        for result in quiz_results:
-            cumulative_total_correct += result['total_correct_answers']
-            cumulative_total_answers += result['total_answers']
-            average_score = cumulative_total_correct / cumulative_total_answers if cumulative_total_answers > 0 else 0
-
-            results_data.append({
-                'date': result['date'],
-                'average_score': average_score,
-            })
+        try:
+            date_from, date_to, bucket = parse_time_series_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-       
+        rollups = DailyScoreRollup.objects.filter(quiz=quiz, user=request.user)
+        results_data = score_time_series(rollups, date_from, date_to, bucket)
 
         return Response(results_data)
-    
-
-   
\ No newline at end of file